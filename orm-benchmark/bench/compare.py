@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+# Everything that decides what a result measured, as opposed to how it went.
+KEY_FIELDS = (
+    "backend",
+    "workload",
+    "size",
+    "batch_size",
+    "loop",
+    "concurrency",
+    "pool_size",
+    "statement_cache_size",
+    "processes",
+)
+
+
+@dataclass
+class Change:
+    key: tuple
+    baseline_ops: float
+    current_ops: float
+    baseline_p99: float
+    current_p99: float
+
+    @property
+    def throughput_change(self) -> float:
+        """Relative throughput change in percent, negative is slower."""
+        if not self.baseline_ops:
+            return 0.0
+        return (self.current_ops / self.baseline_ops - 1) * 100
+
+
+# Values for key fields that runs stored before the field existed had implicitly.
+KEY_DEFAULTS = {"loop": "asyncio"}
+
+
+def result_key(result: dict) -> tuple:
+    return tuple(result.get(name, KEY_DEFAULTS.get(name)) for name in KEY_FIELDS)
+
+
+def compare_runs(baseline: dict, current: dict) -> list[Change]:
+    """Pair up results measuring the same thing in both runs."""
+    baseline_results = {result_key(r): r for r in baseline["results"]}
+    changes = []
+    for result in current["results"]:
+        before = baseline_results.get(result_key(result))
+        if before is None:
+            continue
+        changes.append(
+            Change(
+                key=result_key(result),
+                baseline_ops=before["ops_per_sec"].get("median", 0),
+                current_ops=result["ops_per_sec"].get("median", 0),
+                baseline_p99=before["latency"].get("p99", 0),
+                current_p99=result["latency"].get("p99", 0),
+            )
+        )
+    return changes
+
+
+def format_changes(changes: list[Change], threshold: float) -> str:
+    lines = []
+    for change in changes:
+        backend, workload, size, *rest = change.key
+        verdict = "REGRESSION" if change.throughput_change < -threshold else "ok"
+        lines.append(
+            f"{backend:<10} {workload:<22} {size:>8} "
+            f"{change.baseline_ops:>11.1f} -> {change.current_ops:>11.1f} ops/s "
+            f"({change.throughput_change:+6.1f}%)  "
+            f"p99 {change.baseline_p99 * 1000:.3f} -> "
+            f"{change.current_p99 * 1000:.3f} ms  "
+            f"{verdict}  {dict(zip(KEY_FIELDS[3:], rest))}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,220 @@
+import asyncio
+import cProfile
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Iterable, TypeVar
+
+from .backends import Backend
+from .histogram import Histogram
+from .loops import current_loop_name
+from .memory import MemoryTracker, MemoryUsage
+from .stats import summarize
+from .workloads import Workload
+
+if TYPE_CHECKING:
+    from .multiproc import ProcessGroup
+
+T = TypeVar("T")
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies = Histogram()
+
+    async def __call__(self, operation: Awaitable[T]) -> T:
+        start = time.perf_counter_ns()
+        result = await operation
+        self.latencies.record(time.perf_counter_ns() - start)
+        return result
+
+
+@dataclass
+class Trial:
+    duration: float
+    operations: int
+    rows: int
+    memory: MemoryUsage = field(default_factory=MemoryUsage)
+    wal_bytes: int | None = None
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.operations / self.duration if self.duration else 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.duration if self.duration else 0.0
+
+
+@dataclass
+class BenchmarkResult:
+    backend: str
+    workload: str
+    size: int
+    batch_size: int
+    warmup: int
+    loop: str = "asyncio"
+    concurrency: int = 1
+    pool_size: int | None = None
+    statement_cache_size: int | None = None
+    processes: int = 1
+    trace_allocations: bool = False
+    trials: list[Trial] = field(default_factory=list)
+    latencies: Histogram = field(default_factory=Histogram, repr=False)
+    pool_waits: Histogram = field(default_factory=Histogram, repr=False)
+
+    def wal_bytes_per_row(self) -> float | None:
+        trials = [t for t in self.trials if t.wal_bytes is not None and t.rows]
+        if not trials:
+            return None
+        return sum(t.wal_bytes for t in trials) / sum(t.rows for t in trials)
+
+    def to_dict(self, raw_histograms: bool = False) -> dict:
+        memories = [trial.memory for trial in self.trials] or [MemoryUsage()]
+        return {
+            "backend": self.backend,
+            "workload": self.workload,
+            "size": self.size,
+            "batch_size": self.batch_size,
+            "warmup": self.warmup,
+            "loop": self.loop,
+            "concurrency": self.concurrency,
+            "pool_size": self.pool_size,
+            "statement_cache_size": self.statement_cache_size,
+            "processes": self.processes,
+            "trace_allocations": self.trace_allocations,
+            "trials": [
+                {
+                    "duration": trial.duration,
+                    "operations": trial.operations,
+                    "rows": trial.rows,
+                    "ops_per_sec": trial.ops_per_sec,
+                    "rows_per_sec": trial.rows_per_sec,
+                    "peak_rss": trial.memory.peak_rss,
+                    "rss_growth": trial.memory.rss_growth,
+                    "traced_peak": trial.memory.traced_peak,
+                    "wal_bytes": trial.wal_bytes,
+                }
+                for trial in self.trials
+            ],
+            "ops_per_sec": summarize([trial.ops_per_sec for trial in self.trials]),
+            "rows_per_sec": summarize([trial.rows_per_sec for trial in self.trials]),
+            "latency": self.latencies.summary(),
+            "pool_wait": self.pool_waits.summary(),
+            "wal_bytes_per_row": self.wal_bytes_per_row(),
+            "memory": {
+                "peak_rss": max(memory.peak_rss for memory in memories),
+                "rss_growth": max(memory.rss_growth for memory in memories),
+                "traced_peak": max(
+                    (m.traced_peak for m in memories if m.traced_peak is not None),
+                    default=None,
+                ),
+            },
+        } | (
+            {
+                "latency_histogram": self.latencies.to_dict(),
+                "pool_wait_histogram": self.pool_waits.to_dict(),
+            }
+            if raw_histograms
+            else {}
+        )
+
+
+async def run_trial(
+    backend: Backend,
+    workload: Workload,
+    recorder: Recorder,
+    concurrency: int = 1,
+    indexes: Iterable[int] | None = None,
+) -> int:
+    """Drain the workload's operations with ``concurrency`` workers, return rows.
+
+    ``indexes`` restricts the trial to a subset of the operations.
+    """
+    if indexes is None:
+        indexes = range(workload.operations())
+    indexes = iter(indexes)
+
+    async def worker() -> int:
+        rows = 0
+        for index in indexes:
+            rows += await recorder(workload.operation(backend, index))
+        return rows
+
+    return sum(await asyncio.gather(*(worker() for _ in range(concurrency))))
+
+
+async def run_benchmark(
+    backend: Backend,
+    workload: Workload,
+    warmup: int,
+    trials: int,
+    concurrency: int = 1,
+    group: "ProcessGroup | None" = None,
+    trace_allocations: bool = False,
+    profiler: cProfile.Profile | None = None,
+) -> BenchmarkResult:
+    """Run ``warmup`` + ``trials`` rounds of ``workload``.
+
+    With a ``group`` the timed operations run in its worker processes and
+    ``backend`` is only used by the parent to prepare and clean up data;
+    memory is then the largest peak seen by any of the workers.
+
+    A ``profiler`` is enabled around the timed trials of in-process runs.
+    """
+    result = BenchmarkResult(
+        backend=backend.name,
+        workload=workload.name,
+        size=workload.size,
+        batch_size=workload.batch_size,
+        warmup=warmup,
+        loop=current_loop_name(),
+        concurrency=concurrency,
+        pool_size=backend.pool_size,
+        statement_cache_size=backend.statement_cache_size,
+        processes=group.processes if group else 1,
+        trace_allocations=trace_allocations,
+    )
+    await workload.setup(backend)
+    try:
+        for round_num in range(warmup + trials):
+            await workload.before_trial(backend)
+            wal_start = await backend.wal_position()
+            if group:
+                start = time.perf_counter()
+                shares = await group.run(workload, concurrency, trace_allocations)
+                duration = time.perf_counter() - start
+                rows = sum(share.rows for share in shares)
+                memory = max(shares, key=lambda share: share.memory.peak_rss).memory
+                latencies, pool_waits = Histogram(), Histogram()
+                for share in shares:
+                    latencies.merge(share.latencies)
+                    pool_waits.merge(share.pool_waits)
+            else:
+                backend.pool_waits.reset()
+                recorder = Recorder()
+                profiling = profiler is not None and round_num >= warmup
+                with MemoryTracker(trace_allocations) as tracker:
+                    if profiling:
+                        profiler.enable()
+                    start = time.perf_counter()
+                    rows = await run_trial(backend, workload, recorder, concurrency)
+                    duration = time.perf_counter() - start
+                    if profiling:
+                        profiler.disable()
+                memory = tracker.usage
+                latencies, pool_waits = recorder.latencies, Histogram()
+                # Copied now: the WAL query below checks out a pooled
+                # connection too, and that wait is not part of the workload.
+                pool_waits.merge(backend.pool_waits)
+            wal_end = await backend.wal_position()
+            if round_num < warmup:
+                continue
+            wal_bytes = None if wal_start is None else wal_end - wal_start
+            result.trials.append(
+                Trial(duration, latencies.count, rows, memory, wal_bytes)
+            )
+            result.latencies.merge(latencies)
+            result.pool_waits.merge(pool_waits)
+    finally:
+        await workload.teardown(backend)
+    return result
@@ -0,0 +1,108 @@
+import math
+from array import array
+
+# Every power-of-two range is split into 2 ** SUB_BUCKET_BITS linear buckets,
+# so a recorded value is off by less than 1 / 2 ** SUB_BUCKET_BITS (0.8%).
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Values up to 2 ** 43 ns (about 2.4 hours) get their own bucket,
+# anything slower is counted in the last one.
+MAX_VALUE_BITS = 43
+BUCKETS = (MAX_VALUE_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def bucket_index(value: int) -> int:
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    index = ((shift + 1) << SUB_BUCKET_BITS) + (value >> shift) - SUB_BUCKETS
+    return min(index, BUCKETS - 1)
+
+
+def bucket_upper_bound(index: int) -> int:
+    """Highest value that is counted in bucket ``index``."""
+    if index < SUB_BUCKETS:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    mantissa = (index & (SUB_BUCKETS - 1)) + SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    """HDR-style log-linear histogram of integer nanosecond values.
+
+    Recording is one index computation and one counter bump into a
+    preallocated ``array``, whatever the number of samples, and histograms
+    from several trials or processes merge by adding counters.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        self.counts[bucket_index(value)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "Histogram") -> None:
+        if not other.count:
+            return
+        counts = self.counts
+        for index, bucket_count in enumerate(other.counts):
+            if bucket_count:
+                counts[index] += bucket_count
+        self.min = min(self.min, other.min) if self.count else other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, q: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(math.ceil(q / 100 * self.count), 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Percentiles, min, max and mean in seconds."""
+        if not self.count:
+            return {}
+        summary = {f"p{q:g}": self.percentile(q) / 1e9 for q in PERCENTILES}
+        summary |= {
+            "min": self.min / 1e9,
+            "max": self.max / 1e9,
+            "mean": self.total / self.count / 1e9,
+            "count": self.count,
+        }
+        return summary
+
+    def to_dict(self) -> dict:
+        """Raw non-empty buckets as ``[upper bound ns, count]`` pairs."""
+        return {
+            "unit": "ns",
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "buckets": [
+                [bucket_upper_bound(index), bucket_count]
+                for index, bucket_count in enumerate(self.counts)
+                if bucket_count
+            ],
+        }
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+LOOPS: dict[str, Callable[[], asyncio.AbstractEventLoop] | None] = {
+    "asyncio": asyncio.new_event_loop,
+    "uvloop": None,
+}
+
+# uvloop comes with the ``loops`` extra.
+try:
+    import uvloop
+except ImportError:
+    pass
+else:
+    LOOPS["uvloop"] = uvloop.new_event_loop
+
+
+def available(name: str) -> bool:
+    return LOOPS.get(name) is not None
+
+
+def run(main: Awaitable[T], loop: str = "asyncio") -> T:
+    """``asyncio.run`` on the named event loop implementation."""
+    with asyncio.Runner(loop_factory=LOOPS[loop]) as runner:
+        return runner.run(main)
+
+
+def current_loop_name() -> str:
+    """``asyncio`` or ``uvloop``, judged by the running loop's class."""
+    return type(asyncio.get_running_loop()).__module__.split(".")[0]
@@ -0,0 +1,74 @@
+import resource
+import sys
+import tracemalloc
+from dataclasses import dataclass
+
+
+def current_rss() -> int:
+    return _read_status_kb("VmRSS") * 1024
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    peak_kb = _read_status_kb("VmHWM")
+    if peak_kb:
+        return peak_kb * 1024
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's RSS high-water mark, where Linux allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _read_status_kb(key: str) -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{key}:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+@dataclass
+class MemoryUsage:
+    peak_rss: int = 0
+    rss_growth: int = 0
+    traced_peak: int | None = None
+
+
+class MemoryTracker:
+    """Track peak memory of the code run inside ``with``.
+
+    RSS is always recorded. ``rss_growth`` is only meaningful where the
+    high-water mark can be reset (Linux), elsewhere it is the growth over the
+    process-lifetime peak. ``trace_allocations`` also turns on tracemalloc,
+    which sees Python allocations exactly but slows them down several times,
+    so latencies from such runs should not be compared with untraced ones.
+    """
+
+    def __init__(self, trace_allocations: bool = False) -> None:
+        self.trace_allocations = trace_allocations
+        self.usage = MemoryUsage()
+
+    def __enter__(self) -> "MemoryTracker":
+        reset_peak_rss()
+        self._start_rss = current_rss() or peak_rss()
+        if self.trace_allocations:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.trace_allocations:
+            self.usage.traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.usage.peak_rss = peak_rss()
+        self.usage.rss_growth = max(self.usage.peak_rss - self._start_rss, 0)
@@ -0,0 +1,10 @@
+from tortoise import fields
+from tortoise.models import Model
+
+
+class User(Model):
+    id = fields.IntField(pk=True)
+    name = fields.CharField(max_length=255)
+
+    class Meta:
+        table = "users"
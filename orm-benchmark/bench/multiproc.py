@@ -0,0 +1,128 @@
+import asyncio
+import multiprocessing
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Callable
+
+from .backends import Backend
+from .core import Recorder, run_trial
+from .histogram import Histogram
+from .loops import run
+from .memory import MemoryTracker, MemoryUsage
+from .workloads import Workload
+
+
+@dataclass
+class Share:
+    """What one worker process measured for its slice of a trial."""
+
+    rows: int
+    duration: float
+    latencies: Histogram
+    pool_waits: Histogram
+    memory: MemoryUsage
+
+
+def _worker_main(
+    conn: Connection, backend_factory: Callable[[], Backend], loop: str
+) -> None:
+    run(_serve(conn, backend_factory()), loop)
+
+
+async def _serve(conn: Connection, backend: Backend) -> None:
+    await backend.connect()
+    try:
+        while (command := conn.recv()) is not None:
+            workload, process_index, processes, concurrency, trace = command
+            try:
+                backend.pool_waits.reset()
+                recorder = Recorder()
+                indexes = range(process_index, workload.operations(), processes)
+                with MemoryTracker(trace) as tracker:
+                    start = time.perf_counter()
+                    rows = await run_trial(
+                        backend, workload, recorder, concurrency, indexes
+                    )
+                    duration = time.perf_counter() - start
+                conn.send(
+                    Share(
+                        rows,
+                        duration,
+                        recorder.latencies,
+                        backend.pool_waits,
+                        tracker.usage,
+                    )
+                )
+            except Exception as exc:
+                conn.send(exc)
+    finally:
+        await backend.close()
+
+
+class ProcessGroup:
+    """K worker processes, each with its own event loop and backend connection(s).
+
+    Workers are spawned once and reused for every round. For each trial the
+    parent sends the prepared workload to every worker, worker ``k`` runs the
+    operations ``k, k + K, k + 2K, ...`` and sends its measurements back.
+    Setup, seeding and cleanup stay in the parent process.
+
+    ``backend_factory`` is called once in every worker, so it has to be
+    picklable, e.g. a ``functools.partial`` of a backend class. Workers run
+    on the ``loop`` implementation from ``bench.loops``.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        backend_factory: Callable[[], Backend],
+        loop: str = "asyncio",
+    ) -> None:
+        self.processes = processes
+        self.backend_factory = backend_factory
+        self.loop = loop
+        self.conns: list[Connection] = []
+        self.workers: list[multiprocessing.Process] = []
+
+    def start(self) -> None:
+        context = multiprocessing.get_context("spawn")
+        for _ in range(self.processes):
+            parent_conn, child_conn = context.Pipe()
+            worker = context.Process(
+                target=_worker_main,
+                args=(child_conn, self.backend_factory, self.loop),
+                daemon=True,
+            )
+            worker.start()
+            self.conns.append(parent_conn)
+            self.workers.append(worker)
+
+    async def run(
+        self, workload: Workload, concurrency: int, trace_allocations: bool = False
+    ) -> list[Share]:
+        for process_index, conn in enumerate(self.conns):
+            conn.send(
+                (
+                    workload,
+                    process_index,
+                    self.processes,
+                    concurrency,
+                    trace_allocations,
+                )
+            )
+        shares = await asyncio.gather(
+            *(asyncio.to_thread(conn.recv) for conn in self.conns)
+        )
+        for share in shares:
+            if isinstance(share, BaseException):
+                raise share
+        return shares
+
+    def close(self) -> None:
+        for conn in self.conns:
+            conn.send(None)
+        for worker in self.workers:
+            worker.join()
+        self.conns.clear()
+        self.workers.clear()
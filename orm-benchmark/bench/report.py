@@ -0,0 +1,171 @@
+import json
+from typing import Callable, Iterable, TextIO
+
+MIB = 1024 * 1024
+BREAKDOWN_KEY = (
+    "backend",
+    "loop",
+    "size",
+    "batch_size",
+    "concurrency",
+    "pool_size",
+    "statement_cache_size",
+    "processes",
+)
+MATRIX_KEY = (
+    "backend",
+    "workload",
+    "size",
+    "batch_size",
+    "concurrency",
+    "pool_size",
+    "statement_cache_size",
+    "processes",
+)
+MATRIX_WORKLOADS = ("insert", "select")
+
+
+def _ms(section: str, key: str) -> Callable[[dict], str]:
+    def cell(result: dict) -> str:
+        value = result[section].get(key)
+        return "-" if value is None else f"{value * 1000:.3f}"
+
+    return cell
+
+
+def _optional(key: str, spec: str = "{}") -> Callable[[dict], str]:
+    return lambda result: "-" if result[key] is None else spec.format(result[key])
+
+
+# (header, width, cell) - text columns are left aligned, numbers right aligned.
+COLUMNS: list[tuple[str, int, Callable[[dict], str]]] = [
+    ("backend", -16, lambda r: r["backend"]),
+    ("workload", -22, lambda r: r["workload"]),
+    ("loop", -7, lambda r: r.get("loop", "asyncio")),
+    ("size", 8, lambda r: str(r["size"])),
+    ("batch", 6, lambda r: str(r["batch_size"])),
+    ("proc", 4, lambda r: str(r["processes"])),
+    ("conc", 5, lambda r: str(r["concurrency"])),
+    ("pool", 5, _optional("pool_size")),
+    ("stmt$", 5, _optional("statement_cache_size")),
+    ("ops/s", 10, lambda r: f"{r['ops_per_sec'].get('median', 0):.1f}"),
+    ("rows/s", 11, lambda r: f"{r['rows_per_sec'].get('median', 0):.1f}"),
+    ("p50 ms", 9, _ms("latency", "p50")),
+    ("p90 ms", 9, _ms("latency", "p90")),
+    ("p99 ms", 9, _ms("latency", "p99")),
+    ("p99.9 ms", 9, _ms("latency", "p99.9")),
+    ("max ms", 9, _ms("latency", "max")),
+    ("wait p99 ms", 11, _ms("pool_wait", "p99")),
+    ("WAL B/row", 9, _optional("wal_bytes_per_row", "{:.0f}")),
+    ("RSS+ MiB", 9, lambda r: f"{r['memory']['rss_growth'] / MIB:.1f}"),
+]
+
+
+def _cells(cells: Iterable[str], widths: Iterable[int]) -> str:
+    return " ".join(
+        cell.ljust(-width) if width < 0 else cell.rjust(width)
+        for cell, width in zip(cells, widths)
+    )
+
+
+def _or_dash(value) -> str:
+    return "-" if value is None else str(value)
+
+
+def _row(cells: Iterable[str]) -> str:
+    return _cells(cells, (width for _, width, _ in COLUMNS))
+
+
+def format_text(results: Iterable[dict]) -> str:
+    header = _row(name for name, _, _ in COLUMNS)
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(_row(cell(result) for _, _, cell in COLUMNS))
+    return "\n".join(lines)
+
+
+# (label, workload measured, workload subtracted from it)
+BREAKDOWN = [
+    ("SQL building", "build-select-all", None),
+    ("network + decoding", "select-all-raw", None),
+    ("rows -> dicts (values)", "select-all-values", "select-all-raw"),
+    ("rows -> tuples (values_list)", "select-all-values-list", "select-all-raw"),
+    ("model instantiation", "select-all", "select-all-raw"),
+]
+
+
+def format_breakdown(results: Iterable[dict]) -> str:
+    """Split ORM ``select-all`` time into phases from its lighter variants.
+
+    Works on median latencies of results that only differ by workload.
+    Model instantiation is ``select-all`` minus the raw query and, when it
+    was measured too, minus SQL building.
+    """
+    groups: dict[tuple, dict[str, float]] = {}
+    for result in results:
+        key = tuple(result.get(name) for name in BREAKDOWN_KEY)
+        groups.setdefault(key, {})[result["workload"]] = result["latency"].get("p50", 0)
+    sections = []
+    for key, p50 in groups.items():
+        if "select-all" not in p50 or "select-all-raw" not in p50:
+            continue
+        total = p50["select-all"]
+        where = " ".join(f"{name}={value}" for name, value in zip(BREAKDOWN_KEY, key))
+        lines = [f"select-all breakdown, p50 ({where}):"]
+        for label, workload, base in BREAKDOWN:
+            if workload not in p50:
+                continue
+            value = p50[workload] - (p50[base] if base else 0)
+            if workload == "select-all":
+                value -= p50.get("build-select-all", 0)
+            share = f"{value / total * 100:5.1f}% of select-all" if total else ""
+            lines.append(f"  {label:<30} {value * 1000:>10.3f} ms  {share}")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
+
+
+def format_loop_matrix(results: Iterable[dict]) -> str:
+    """Median ops/s of insert and select workloads per event loop.
+
+    One row per backend and workload setting, one column per loop with the
+    speedup over the first loop of the sweep. Empty unless results were
+    measured on more than one loop.
+    """
+    loops: list[str] = []
+    rows: dict[tuple, dict[str, float]] = {}
+    for result in results:
+        if not result["workload"].startswith(MATRIX_WORKLOADS):
+            continue
+        loop = result.get("loop", "asyncio")
+        if loop not in loops:
+            loops.append(loop)
+        key = tuple(result.get(name) for name in MATRIX_KEY)
+        rows.setdefault(key, {})[loop] = result["ops_per_sec"].get("median", 0)
+    if len(loops) < 2:
+        return ""
+    widths = (-16, -22, 8, 6, 5, 5, 5, 4)
+    names = ("backend", "workload", "size", "batch", "conc", "pool", "stmt$", "proc")
+    header = _cells(names, widths)
+    header += "".join(f" {loop:>20}" for loop in loops)
+    lines = [
+        f"ops/s by event loop (speedup over {loops[0]}):",
+        header,
+        "-" * len(header),
+    ]
+    for key, ops in rows.items():
+        line = _cells((_or_dash(value) for value in key), widths)
+        base = ops.get(loops[0])
+        for loop in loops:
+            if loop not in ops:
+                line += f" {'-':>20}"
+            elif base:
+                line += f" {ops[loop]:>12.1f} ({ops[loop] / base:4.2f}x)"
+            else:
+                line += f" {ops[loop]:>20.1f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def write_json(results: list[dict], stream: TextIO) -> None:
+    json.dump({"results": results}, stream, indent=2)
+    stream.write("\n")
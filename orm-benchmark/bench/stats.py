@@ -0,0 +1,24 @@
+import math
+from typing import Sequence
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence, ``q`` in [0, 100]."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: Sequence[float]) -> dict[str, float]:
+    values = sorted(latencies)
+    if not values:
+        return {}
+    return {
+        "min": values[0],
+        "median": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+        "mean": sum(values) / len(values),
+    }
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import platform
+import socket
+import sys
+import uuid
+from datetime import datetime, timezone
+from importlib import metadata
+
+DEFAULT_STORE = "results.jsonl"
+PACKAGES = ("asyncpg", "tortoise-orm", "pypika-tortoise", "aiosqlite", "uvloop")
+
+
+def environment() -> dict:
+    packages = {}
+    for package in PACKAGES:
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "packages": packages,
+    }
+
+
+def fingerprint(env: dict) -> str:
+    """Short hash of the environment, equal for runs on the same box and stack."""
+    encoded = json.dumps(env, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+def append_run(path: str, results: list[dict], label: str | None = None) -> dict:
+    env = environment()
+    run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "label": label,
+        "fingerprint": fingerprint(env),
+        "environment": env,
+        "argv": sys.argv[1:],
+        "results": results,
+    }
+    with open(path, "a") as store:
+        store.write(json.dumps(run) + "\n")
+    return run
+
+
+def load_runs(path: str) -> list[dict]:
+    try:
+        with open(path) as store:
+            return [json.loads(line) for line in store if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def find_run(runs: list[dict], ref: str) -> dict:
+    """Resolve ``latest``, a label (newest run wins) or a run id prefix."""
+    if ref == "latest" and runs:
+        return runs[-1]
+    for run in reversed(runs):
+        if run["label"] == ref or run["run_id"].startswith(ref):
+            return run
+    raise LookupError(f"no stored run matches {ref!r}")
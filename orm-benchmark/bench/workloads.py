@@ -0,0 +1,290 @@
+import abc
+
+from .backends import USER_NAME, Backend, PreparedStatements, SqlBuilder
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class Workload(abc.ABC):
+    """A repeatable piece of database work split into numbered operations.
+
+    ``setup`` and ``teardown`` run once per benchmark, ``before_trial`` runs
+    before every warmup round and trial. A trial awaits ``operation`` for
+    every index in ``range(operations())``, possibly from several concurrent
+    workers, and only those calls are timed. ``batch_size`` only matters
+    to workloads that set ``batched``.
+    """
+
+    name: str
+    batched = False
+
+    def __init__(self, size: int, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.size = size
+        self.batch_size = batch_size
+
+    def supports(self, backend: Backend) -> bool:
+        return True
+
+    async def setup(self, backend: Backend) -> None:
+        await backend.truncate()
+
+    async def before_trial(self, backend: Backend) -> None:
+        pass
+
+    def operations(self) -> int:
+        return self.size
+
+    @abc.abstractmethod
+    async def operation(self, backend: Backend, index: int) -> int:
+        """Run operation number ``index`` and return the number of rows it touched."""
+
+    async def teardown(self, backend: Backend) -> None:
+        await backend.truncate()
+
+
+class Insert(Workload):
+    name = "insert"
+
+    async def before_trial(self, backend: Backend) -> None:
+        await backend.truncate()
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        await backend.insert(USER_NAME)
+        return 1
+
+
+class BulkInsert(Insert):
+    """Insert ``size`` rows in batches of ``batch_size`` with one backend strategy.
+
+    Each batch is a single timed operation, so latencies are per batch and
+    ``rows_per_sec`` is the number to compare between strategies.
+    """
+
+    strategy: str
+    batched = True
+
+    def supports(self, backend: Backend) -> bool:
+        return self.strategy in backend.insert_strategies
+
+    def operations(self) -> int:
+        return -(-self.size // self.batch_size)
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        rows = min(self.batch_size, self.size - index * self.batch_size)
+        await backend.bulk_insert(self.strategy, [USER_NAME] * rows)
+        return rows
+
+
+class InsertExecutemany(BulkInsert):
+    name = "insert-executemany"
+    strategy = "executemany"
+
+
+class InsertCopy(BulkInsert):
+    name = "insert-copy"
+    strategy = "copy"
+
+
+class InsertValues(BulkInsert):
+    name = "insert-values"
+    strategy = "values"
+
+
+class InsertBulkCreate(BulkInsert):
+    name = "insert-bulk-create"
+    strategy = "bulk_create"
+
+
+class InsertTransaction(Insert):
+    """Single-row inserts with an explicit commit every ``batch_size`` rows.
+
+    Each transaction is one timed operation. Run with ``--batch-size 1 10
+    100 1000 10000`` to see how commit granularity trades throughput
+    against transaction size, and compare the WAL bytes per row.
+    """
+
+    name = "insert-tx"
+    batched = True
+
+    def operations(self) -> int:
+        return -(-self.size // self.batch_size)
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        rows = min(self.batch_size, self.size - index * self.batch_size)
+        await backend.insert_in_transaction([USER_NAME] * rows)
+        return rows
+
+
+class SelectAll(Workload):
+    name = "select-all"
+
+    async def setup(self, backend: Backend) -> None:
+        await super().setup(backend)
+        await backend.seed(self.size)
+
+    def operations(self) -> int:
+        return 1
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        return await backend.select_all()
+
+
+class SelectAllShaped(SelectAll):
+    """``select-all`` reading rows as something lighter than model instances."""
+
+    shape: str
+
+    def supports(self, backend: Backend) -> bool:
+        return self.shape in backend.read_shapes
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        return await backend.select_all_as(self.shape)
+
+
+class SelectAllValues(SelectAllShaped):
+    name = "select-all-values"
+    shape = "values"
+
+
+class SelectAllValuesList(SelectAllShaped):
+    name = "select-all-values-list"
+    shape = "values_list"
+
+
+class SelectAllRaw(SelectAllShaped):
+    """The ORM's own connection running plain SQL: network plus decoding only."""
+
+    name = "select-all-raw"
+    shape = "raw"
+
+
+class BuildSelectAll(Workload):
+    """Only compile the ``select-all`` query, ``size`` times per trial."""
+
+    name = "build-select-all"
+
+    def supports(self, backend: Backend) -> bool:
+        return isinstance(backend, SqlBuilder)
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        backend.build_select_all()
+        return 0
+
+
+class SelectStream(SelectAll):
+    """Like ``select-all`` but never holds more than ``batch_size`` rows.
+
+    asyncpg uses a server-side cursor with ``prefetch=batch_size``, Tortoise
+    pages through the table by primary key.
+    """
+
+    name = "select-stream"
+    batched = True
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        return await backend.select_stream(self.batch_size)
+
+
+class SelectByPk(Workload):
+    name = "select-by-pk"
+
+    async def setup(self, backend: Backend) -> None:
+        await super().setup(backend)
+        await backend.seed(self.size)
+        self.ids = await backend.primary_keys()
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        await backend.select_by_pk(self.ids[index])
+        return 1
+
+
+class SelectByPkPrepared(SelectByPk):
+    """``select-by-pk`` through one statement prepared up front with ``prepare()``.
+
+    A prepared statement belongs to a single connection, so this only runs
+    without a pool.
+    """
+
+    name = "select-by-pk-prepared"
+
+    def supports(self, backend: Backend) -> bool:
+        return isinstance(backend, PreparedStatements) and not backend.pool_size
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        await backend.select_by_pk_prepared(self.ids[index])
+        return 1
+
+
+class BuildSelectByPk(SelectByPk):
+    """Only compile the ``select-by-pk`` query, never send it.
+
+    Subtracting this from ``select-by-pk`` on the same backend leaves the
+    round trip plus result decoding, which is what an ORM cannot avoid.
+    """
+
+    name = "build-select-by-pk"
+
+    def supports(self, backend: Backend) -> bool:
+        return isinstance(backend, SqlBuilder)
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        backend.build_select_by_pk(self.ids[index])
+        return 1
+
+
+class Update(SelectByPk):
+    """Rename every seeded row once per round.
+
+    Each round writes names no earlier round wrote, since SQLite skips
+    writing a row that would not change and the round would time nothing.
+    """
+
+    name = "update"
+
+    async def setup(self, backend: Backend) -> None:
+        await super().setup(backend)
+        self.round = 0
+
+    async def before_trial(self, backend: Backend) -> None:
+        self.round += 1
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        await backend.update(self.ids[index], f"User {self.round}-{index}")
+        return 1
+
+
+class Delete(Workload):
+    name = "delete"
+
+    async def before_trial(self, backend: Backend) -> None:
+        await backend.truncate()
+        await backend.seed(self.size)
+        self.ids = await backend.primary_keys()
+
+    async def operation(self, backend: Backend, index: int) -> int:
+        await backend.delete(self.ids[index])
+        return 1
+
+
+WORKLOADS: dict[str, type[Workload]] = {
+    workload.name: workload
+    for workload in (
+        Insert,
+        InsertExecutemany,
+        InsertCopy,
+        InsertValues,
+        InsertBulkCreate,
+        InsertTransaction,
+        SelectAll,
+        SelectAllValues,
+        SelectAllValuesList,
+        SelectAllRaw,
+        BuildSelectAll,
+        SelectStream,
+        SelectByPk,
+        SelectByPkPrepared,
+        BuildSelectByPk,
+        Update,
+        Delete,
+    )
+}
@@ -0,0 +1,309 @@
+import argparse
+import cProfile
+import itertools
+import os
+import sys
+from functools import partial
+
+from bench.backends import BACKENDS, DEFAULT_DSN, DEFAULT_SQLITE_DSN
+from bench.compare import compare_runs, format_changes
+from bench.core import run_benchmark
+from bench import loops
+from bench.multiproc import ProcessGroup
+from bench.report import (
+    format_breakdown,
+    format_loop_matrix,
+    format_text,
+    write_json,
+)
+from bench.store import DEFAULT_STORE, append_run, find_run, load_runs
+from bench.workloads import DEFAULT_BATCH_SIZE, WORKLOADS
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="raw driver vs Tortoise ORM benchmarks"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run workloads against backends")
+    run.add_argument(
+        "-b", "--backend", nargs="+", choices=BACKENDS, default=list(BACKENDS)
+    )
+    run.add_argument(
+        "-w", "--workload", nargs="+", choices=WORKLOADS, default=list(WORKLOADS)
+    )
+    run.add_argument(
+        "-n",
+        "--size",
+        nargs="+",
+        type=int,
+        default=[3000],
+        help="rows per trial (table size for select workloads), swept if several",
+    )
+    run.add_argument(
+        "--batch-size",
+        nargs="+",
+        type=int,
+        default=[DEFAULT_BATCH_SIZE],
+        help="rows per batch for bulk insert workloads, rows per commit for "
+        "insert-tx and cursor prefetch / chunk size for select-stream, swept if "
+        "several "
+        "(insert-values is capped at 32767 by the Postgres protocol)",
+    )
+    run.add_argument(
+        "-c",
+        "--concurrency",
+        nargs="+",
+        type=int,
+        default=[1],
+        help="numbers of concurrent workers to sweep",
+    )
+    run.add_argument(
+        "-p",
+        "--pool-size",
+        nargs="+",
+        type=int,
+        default=[None],
+        help="connection pool sizes to sweep (default: a single connection)",
+    )
+    run.add_argument(
+        "--statement-cache-size",
+        nargs="+",
+        type=int,
+        default=[None],
+        help="asyncpg statement_cache_size values to sweep, 0 disables the cache "
+        "(default: asyncpg's own default)",
+    )
+    run.add_argument(
+        "-P",
+        "--processes",
+        nargs="+",
+        type=int,
+        default=[1],
+        help="numbers of worker processes to sweep, each with its own event loop "
+        "and connection(s)",
+    )
+    run.add_argument(
+        "-l",
+        "--loop",
+        nargs="+",
+        choices=loops.LOOPS,
+        default=["asyncio"],
+        help="event loop implementations to sweep (uvloop needs the uvloop package)",
+    )
+    run.add_argument("--warmup", type=int, default=1, help="untimed rounds")
+    run.add_argument("--trials", type=int, default=5, help="timed rounds")
+    run.add_argument("--dsn", default=DEFAULT_DSN, help="Postgres DSN")
+    run.add_argument(
+        "--sqlite-dsn",
+        default=DEFAULT_SQLITE_DSN,
+        help="database for the sqlite backends (sqlite://:memory: is per process)",
+    )
+    run.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="record tracemalloc peaks next to RSS (slows Python allocations down)",
+    )
+    run.add_argument(
+        "--json",
+        metavar="PATH",
+        help="write machine-readable results to PATH ('-' for stdout)",
+    )
+    run.add_argument(
+        "--raw-histograms",
+        action="store_true",
+        help="include the raw latency and pool wait histograms in the JSON output",
+    )
+    run.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="cProfile the timed trials of in-process runs and write one .prof "
+        "file per benchmark into DIR",
+    )
+    run.add_argument("--label", help="name this run so it can be used as a baseline")
+    run.add_argument(
+        "--no-store", action="store_true", help="do not append the run to the store"
+    )
+
+    history = commands.add_parser("history", help="list stored runs")
+
+    compare = commands.add_parser(
+        "compare",
+        help="diff a stored run against a baseline, exit 1 on throughput regressions",
+    )
+    compare.add_argument("baseline", help="run id (prefix), label or 'latest'")
+    compare.add_argument(
+        "current", nargs="?", default="latest", help="run to check (default: latest)"
+    )
+    compare.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=5.0,
+        help="allowed throughput drop in percent (default: 5)",
+    )
+
+    for command in (run, history, compare):
+        command.add_argument(
+            "--store",
+            default=DEFAULT_STORE,
+            help=f"JSON-lines results store (default: {DEFAULT_STORE})",
+        )
+    return parser
+
+
+async def run_all(args: argparse.Namespace, loop: str) -> list[dict]:
+    results = []
+    for backend_name, pool_size, cache_size, processes in itertools.product(
+        args.backend, args.pool_size, args.statement_cache_size, args.processes
+    ):
+        backend_cls = BACKENDS[backend_name]
+        if cache_size is not None and not backend_cls.statement_cache:
+            print(f"skip: statement cache size on {backend_name}", file=sys.stderr)
+            continue
+        if pool_size is not None and not backend_cls.pooled:
+            print(f"skip: pool size on {backend_name}", file=sys.stderr)
+            continue
+        dsn = args.sqlite_dsn if backend_cls.dialect == "sqlite" else args.dsn
+        backend_factory = partial(backend_cls, dsn, pool_size, cache_size)
+        results.extend(await run_backend(args, backend_factory, processes, loop))
+    return results
+
+
+async def run_backend(
+    args: argparse.Namespace, backend_factory: partial, processes: int, loop: str
+) -> list[dict]:
+    results = []
+    backend = backend_factory()
+    group = None
+    if processes > 1:
+        group = ProcessGroup(processes, backend_factory, loop)
+        group.start()
+    await backend.connect()
+    try:
+        for workload_name in args.workload:
+            workload_cls = WORKLOADS[workload_name]
+            batch_sizes = (
+                args.batch_size if workload_cls.batched else [DEFAULT_BATCH_SIZE]
+            )
+            for size, batch_size, concurrency in itertools.product(
+                args.size, batch_sizes, args.concurrency
+            ):
+                workload = workload_cls(size, batch_size)
+                if not workload.supports(backend):
+                    print(f"skip: {workload.name} on {backend.name}", file=sys.stderr)
+                    break
+                profiler = cProfile.Profile() if args.profile and not group else None
+                result = await run_benchmark(
+                    backend,
+                    workload,
+                    args.warmup,
+                    args.trials,
+                    concurrency,
+                    group,
+                    args.trace_allocations,
+                    profiler,
+                )
+                results.append(result.to_dict(args.raw_histograms))
+                if profiler:
+                    dump_profile(args.profile, profiler, results[-1])
+    finally:
+        await backend.close()
+        if group:
+            group.close()
+    return results
+
+
+def dump_profile(directory: str, profiler: cProfile.Profile, result: dict) -> None:
+    os.makedirs(directory, exist_ok=True)
+    name = "-".join(
+        str(result[key])
+        for key in (
+            "backend",
+            "workload",
+            "loop",
+            "size",
+            "batch_size",
+            "concurrency",
+            "pool_size",
+        )
+    )
+    path = os.path.join(directory, f"{name}.prof")
+    profiler.dump_stats(path)
+    print(f"profile: {path}", file=sys.stderr)
+
+
+def run_command(args: argparse.Namespace) -> int:
+    results = []
+    for loop in args.loop:
+        results.extend(loops.run(run_all(args, loop), loop))
+    if not args.no_store:
+        run = append_run(args.store, results, args.label)
+        print(f"stored run {run['run_id']} in {args.store}", file=sys.stderr)
+    if args.json == "-":
+        write_json(results, sys.stdout)
+        return 0
+    print(format_text(results))
+    if breakdown := format_breakdown(results):
+        print()
+        print(breakdown)
+    if matrix := format_loop_matrix(results):
+        print()
+        print(matrix)
+    if args.json:
+        with open(args.json, "w") as stream:
+            write_json(results, stream)
+    return 0
+
+
+def history_command(args: argparse.Namespace) -> int:
+    for run in load_runs(args.store):
+        workloads = sorted({result["workload"] for result in run["results"]})
+        print(
+            f"{run['run_id']}  {run['created_at']}  {run['fingerprint']}  "
+            f"{run['label'] or '-':<12} {', '.join(workloads)}"
+        )
+    return 0
+
+
+def compare_command(args: argparse.Namespace) -> int:
+    runs = load_runs(args.store)
+    try:
+        baseline = find_run(runs, args.baseline)
+        current = find_run(runs, args.current)
+    except LookupError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if baseline["fingerprint"] != current["fingerprint"]:
+        print(
+            "warning: runs come from different environments "
+            f"({baseline['fingerprint']} vs {current['fingerprint']})",
+            file=sys.stderr,
+        )
+    changes = compare_runs(baseline, current)
+    if not changes:
+        print("no comparable results in the two runs", file=sys.stderr)
+        return 2
+    print(format_changes(changes, args.threshold))
+    regressions = [c for c in changes if c.throughput_change < -args.threshold]
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "history":
+        return history_command(args)
+    if args.command == "compare":
+        return compare_command(args)
+    if max(args.concurrency) > 1 and None in args.pool_size:
+        parser.error("--concurrency above 1 needs --pool-size")
+    for loop in args.loop:
+        if not loops.available(loop):
+            parser.error(f"--loop {loop} is not installed")
+    return run_command(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
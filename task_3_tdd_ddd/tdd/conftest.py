@@ -1,4 +1,6 @@
 import pytest
+from typing import List
+from uuid import uuid4
 from .package.tracker import TaskTracker
 from .models.task import Task
 from .storage.db import Database
@@ -9,6 +11,17 @@ def new_task() -> Task:
     return Task(name="Task 1", description="description", status="todo")
 
 
+@pytest.fixture
+def make_tasks():
+    def make(count: int) -> List[Task]:
+        return [
+            Task(id=uuid4(), name=f"Task {i}", description="description", status="todo")
+            for i in range(count)
+        ]
+
+    return make
+
+
 @pytest.fixture
 def database():
     return Database()
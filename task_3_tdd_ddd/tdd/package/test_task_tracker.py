@@ -60,3 +60,30 @@ def test__get_all_tasks(task_tracker, database):
     task_tracker.add_task(task_2)
     task_tracker.add_task(task_3)
     assert len(task_tracker.get_all_tasks()) == 3
+
+
+def test__add_tasks__to_tracker(task_tracker, make_tasks):
+    tasks = make_tasks(3)
+    task_ids = task_tracker.add_tasks(tasks)
+    assert task_ids == [IsUUID] * 3
+    assert [task.id for task in task_tracker.get_all_tasks()] == task_ids
+
+
+def test__set_new_correct_statuses_to_tasks(task_tracker, make_tasks):
+    task_ids = task_tracker.add_tasks(make_tasks(2))
+    task_tracker.tasks_set_status({task_ids[0]: "in_progress", task_ids[1]: "done"})
+    assert task_tracker.get_task_by_id(task_ids[0]).status == "in_progress"
+    assert task_tracker.get_task_by_id(task_ids[1]).status == "done"
+
+
+def test__set_new_incorrect_statuses_changes_nothing(task_tracker, make_tasks):
+    task_ids = task_tracker.add_tasks(make_tasks(2))
+    with pytest.raises(ValueError):
+        task_tracker.tasks_set_status({task_ids[0]: "done", task_ids[1]: "YOLO"})
+    assert [task.status for task in task_tracker.get_all_tasks()] == ["todo", "todo"]
+
+
+def test__delete_tasks_by_ids(task_tracker, make_tasks):
+    task_ids = task_tracker.add_tasks(make_tasks(3))
+    task_tracker.delete_tasks_by_ids(task_ids[:2])
+    assert [task.id for task in task_tracker.get_all_tasks()] == task_ids[2:]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, Iterable, List
 from uuid import UUID, uuid4
 from ..models.task import Task
 from ..storage.db import Database
@@ -17,20 +17,39 @@ class TaskTracker:
         self.db.save_task(new_task)
         return new_task.id
 
+    def add_tasks(self, tasks: Iterable[Task]) -> List[UUID]:
+        new_tasks = list(tasks)
+        for new_task in new_tasks:
+            new_task.id = uuid4()
+        self.db.save_tasks(new_tasks)
+        return [new_task.id for new_task in new_tasks]
+
     def get_task_by_id(self, task_id: UUID) -> Task | None:
         return self.db.get_task_by_id(task_id)
 
-    def task_set_status(self, task_id: UUID, status: str):
+    def _check_status(self, status: str):
         if status not in self.VALID_STATUSES:
             raise ValueError(
                 f"Invalid status: {status}. Should be one of {self.VALID_STATUSES}"
             )
 
+    def task_set_status(self, task_id: UUID, status: str):
+        self._check_status(status)
+
         self.db.set_task_status(task_id, status)
 
+    def tasks_set_status(self, statuses: Dict[UUID, str]):
+        for status in statuses.values():
+            self._check_status(status)
+
+        self.db.set_statuses(statuses)
+
     def delete_task_by_id(self, task_id: UUID) -> None:
         self.db.delete_task_by_id(task_id)
 
+    def delete_tasks_by_ids(self, task_ids: Iterable[UUID]) -> None:
+        self.db.delete_tasks_by_ids(task_ids)
+
     def get_all_tasks(self) -> List[dict] | None:
         response = self.db.get_all_tasks()
         return response if response is not None else None
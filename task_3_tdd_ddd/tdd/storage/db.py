@@ -1,6 +1,7 @@
 import sqlite3
+from contextlib import contextmanager
 from ..models.task import Task
-from typing import List
+from typing import Dict, Iterable, Iterator, List
 from uuid import UUID
 
 DB_NAME = "tasks.db"
@@ -11,6 +12,32 @@ class Database:
         self.db_connection = sqlite3.connect(database=DB_NAME)
         self.db_connection.row_factory = sqlite3.Row
         self.cursor = self.db_connection.cursor()
+        self.in_transaction = False
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """Run the writes of the block as one unit of work with a single commit.
+
+        Everything is rolled back if the block raises. Nested blocks join
+        the outermost one.
+        """
+        if self.in_transaction:
+            yield self
+            return
+        self.in_transaction = True
+        try:
+            yield self
+        except BaseException:
+            self.db_connection.rollback()
+            raise
+        else:
+            self.db_connection.commit()
+        finally:
+            self.in_transaction = False
+
+    def _commit(self):
+        if not self.in_transaction:
+            self.db_connection.commit()
 
     def _migrate_db(self):
         self.cursor.execute(
@@ -24,13 +51,25 @@ class Database:
         self.cursor.execute("""DELETE FROM tasks;""")
         self.db_connection.commit()
 
-    def save_task(self, task: Task):
+    @staticmethod
+    def _task_row(task: Task) -> dict:
         dict_to_save = task.model_dump()
         dict_to_save["id"] = str(dict_to_save["id"])
+        return dict_to_save
+
+    def save_task(self, task: Task):
         self.cursor.execute(
-            "INSERT INTO tasks VALUES (:id, :name, :description, :status)", dict_to_save
+            "INSERT INTO tasks VALUES (:id, :name, :description, :status)",
+            self._task_row(task),
         )
-        self.db_connection.commit()
+        self._commit()
+
+    def save_tasks(self, tasks: Iterable[Task]):
+        with self.transaction():
+            self.cursor.executemany(
+                "INSERT INTO tasks VALUES (:id, :name, :description, :status)",
+                (self._task_row(task) for task in tasks),
+            )
 
     def get_task_by_id(self, task_id: UUID) -> Task | None:
         task_dict = self.cursor.execute(
@@ -65,8 +104,25 @@ class Database:
             "UPDATE tasks SET status=:status WHERE id=:id",
             {"id": str(task_id), "status": status},
         )
-        self.db_connection.commit()
+        self._commit()
+
+    def set_statuses(self, statuses: Dict[UUID, str]):
+        with self.transaction():
+            self.cursor.executemany(
+                "UPDATE tasks SET status=:status WHERE id=:id",
+                (
+                    {"id": str(task_id), "status": status}
+                    for task_id, status in statuses.items()
+                ),
+            )
 
     def delete_task_by_id(self, task_id: UUID) -> None:
         self.cursor.execute("DELETE FROM tasks WHERE id=:id", {"id": str(task_id)})
-        self.db_connection.commit()
+        self._commit()
+
+    def delete_tasks_by_ids(self, task_ids: Iterable[UUID]) -> None:
+        with self.transaction():
+            self.cursor.executemany(
+                "DELETE FROM tasks WHERE id=:id",
+                ({"id": str(task_id)} for task_id in task_ids),
+            )
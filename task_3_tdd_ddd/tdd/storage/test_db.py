@@ -1,7 +1,54 @@
 import os
-from .db import DB_NAME
+import sqlite3
+
+import pytest
+
+from .db import DB_NAME, Database
 
 
 def test__db_created(database):
     database._migrate_db()
     assert os.path.exists(DB_NAME)
+
+
+def test__save_tasks(database, make_tasks):
+    tasks = make_tasks(3)
+    database.save_tasks(tasks)
+    assert [task.id for task in database.get_all_tasks()] == [
+        task.id for task in tasks
+    ]
+
+
+def test__set_statuses(database, make_tasks):
+    tasks = make_tasks(2)
+    database.save_tasks(tasks)
+    database.set_statuses({tasks[0].id: "done", tasks[1].id: "in_progress"})
+    assert database.get_task_by_id(tasks[0].id).status == "done"
+    assert database.get_task_by_id(tasks[1].id).status == "in_progress"
+
+
+def test__delete_tasks_by_ids(database, make_tasks):
+    tasks = make_tasks(3)
+    database.save_tasks(tasks)
+    database.delete_tasks_by_ids([tasks[0].id, tasks[2].id])
+    assert [task.id for task in database.get_all_tasks()] == [tasks[1].id]
+
+
+def test__transaction_commits_at_the_end(database, make_tasks):
+    other_connection = Database()
+    task = make_tasks(1)[0]
+    with database.transaction():
+        database.save_task(task)
+        database.set_task_status(task.id, "done")
+        assert other_connection.get_task_by_id(task.id) is None
+    assert other_connection.get_task_by_id(task.id).status == "done"
+    other_connection.db_connection.close()
+
+
+def test__transaction_rolls_back_on_error(database, make_tasks):
+    tasks = make_tasks(2)
+    with pytest.raises(sqlite3.IntegrityError):
+        with database.transaction():
+            database.save_task(tasks[0])
+            database.save_tasks(tasks)
+    assert database.get_all_tasks() is None
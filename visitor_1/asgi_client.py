@@ -0,0 +1,60 @@
+"""GET requests straight into an ASGI app, no server or sockets, for the
+benchmark scripts.
+"""
+import asyncio
+from typing import Callable, Iterable
+
+from starlette.types import ASGIApp, Message
+
+
+def http_scope(
+    path: str, query: bytes = b"", headers: Iterable[tuple[bytes, bytes]] = ()
+) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query,
+        "headers": [(b"host", b"localhost"), *headers],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def request(
+    app: ASGIApp,
+    path: str,
+    query: bytes = b"",
+    headers: Iterable[tuple[bytes, bytes]] = (),
+    on_body: Callable[[bytes], None] | None = None,
+) -> int:
+    """Send a GET to ``app`` and return the status.
+
+    ``on_body`` is called with every non-empty chunk of the response body.
+    """
+    status = 0
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            # Streaming responses listen for a disconnect until they are
+            # done; a client that never disconnects blocks here.
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif on_body is not None and message.get("body"):
+            on_body(message["body"])
+
+    await app(http_scope(path, query, headers), receive, send)
+    return status
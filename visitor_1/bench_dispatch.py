@@ -0,0 +1,101 @@
+"""Per-request render overhead of the content registry vs an isinstance chain.
+
+Registers N synthetic content types and times, for an item of the last
+registered type (the worst case for a chain):
+
+* dispatch: finding the template and building the context,
+* render: the full ``handle_content`` call including Jinja2.
+
+    python bench_dispatch.py --types 3 12 24 48 96
+"""
+import argparse
+import timeit
+import types
+
+from fastapi import Request
+
+from content import (
+    Article,
+    Content,
+    content_types,
+    handle_content,
+    page_context,
+    templates,
+)
+
+
+def make_types(count: int) -> list[type]:
+    """``count`` Article-like content types, each registered with the site."""
+    return [
+        types.new_class(
+            f"Kind{index}",
+            (Article,),
+            {"template": "article.html", "context": {"kind": index}},
+        )
+        for index in range(count)
+    ]
+
+
+def chain_handle_content(chain: list[tuple[type, str]], item: Content, request):
+    """What ``handle_content`` did before the registry, for N types."""
+    template_name = ""
+    content_context = {"request": request}
+    for cls, template in chain:
+        if isinstance(item, cls):
+            template_name = template
+            content_context = content_context | item.render()
+            break
+    return template_name, content_context
+
+
+def registry_dispatch(item: Content, request):
+    content_type = content_types[type(item)]
+    content_context = page_context(content_type, item)
+    content_context["request"] = request
+    return content_type.template, content_context
+
+
+def per_call_us(statement, number: int) -> float:
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--types", nargs="+", type=int, default=[3, 12, 24, 48, 96])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    # Warm the Jinja2 template cache so the first row is not a compile.
+    templates.get_template("article.html")
+    print(
+        f"{'types':>6} {'chain us':>10} {'registry us':>12} "
+        f"{'chain render us':>16} {'registry render us':>19}"
+    )
+    for count in args.types:
+        kinds = make_types(count)
+        # The item's type goes last, so the chain checks every entry.
+        chain = [(cls, "article.html") for cls in reversed(kinds)]
+        item = kinds[0]("title", "content", "author")
+
+        chain_us = per_call_us(
+            lambda: chain_handle_content(chain, item, request), args.number
+        )
+        registry_us = per_call_us(lambda: registry_dispatch(item, request), args.number)
+
+        def chain_render():
+            name, context = chain_handle_content(chain, item, request)
+            return templates.TemplateResponse(name=name, context=context)
+
+        chain_render_us = per_call_us(chain_render, args.number // 10)
+        registry_render_us = per_call_us(
+            lambda: handle_content(item, request), args.number // 10
+        )
+        print(
+            f"{count:>6} {chain_us:>10.2f} {registry_us:>12.2f} "
+            f"{chain_render_us:>16.2f} {registry_render_us:>19.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
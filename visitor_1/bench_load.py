@@ -0,0 +1,276 @@
+"""Throughput and latency of the whole app under concurrent load.
+
+Drives ``main.app`` in-process through the ASGI interface (middleware,
+routing, store, page cache, templates and static files, no sockets), so
+numbers move with the app code rather than with the machine's network
+stack. Each run seeds a fresh store with ``--items`` articles, then
+``--concurrency`` clients send ``--requests`` requests drawn from a mix
+of:
+
+* index: ``/``,
+* hit: ``/content/{id}`` of an existing item,
+* miss: ``/content/{id}`` of an id that does not exist,
+* static: a hashed ``/static/...`` URL.
+
+and reports req/s and latency percentiles, overall and per kind.
+``--output`` appends the results as JSON lines tagged with the git
+revision; ``--compare`` prints the change against such a file, so a
+template, cache or storage change can be judged against the commit
+before it:
+
+    python bench_load.py --output base.jsonl
+    git switch my-change
+    python bench_load.py --compare base.jsonl
+
+Hits spread over ``--items`` ids; with more items than the page cache
+holds they exercise rendering as well as the cache.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from asgi_client import request
+
+KINDS = ("index", "hit", "miss", "static")
+HEADERS = ((b"accept-encoding", b"gzip, br"),)
+DEFAULT_MIX = "index=1,hit=6,miss=1,static=2"
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(
+                f"unknown kind {kind!r}, expected one of {', '.join(KINDS)}"
+            )
+        weights[kind] = int(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("a mix needs a non-zero weight")
+    return weights
+
+
+def percentile(ordered: list[int], p: float) -> int:
+    """Nearest-rank percentile of sorted values."""
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+class Target:
+    """The paths a run picks from, known once the app has started."""
+
+    def __init__(self, ids: list[int], static_paths: list[str]) -> None:
+        self.ids = ids
+        self.missing = max(ids, default=0) + 1
+        self.static_paths = static_paths
+
+    def path(self, kind: str, rng: random.Random) -> str:
+        if kind == "index":
+            return "/"
+        if kind == "hit":
+            return f"/content/{rng.choice(self.ids)}"
+        if kind == "miss":
+            return f"/content/{self.missing + rng.randrange(1_000_000)}"
+        return rng.choice(self.static_paths)
+
+
+async def load(
+    app,
+    target: Target,
+    mix: dict[str, int],
+    concurrency: int,
+    requests: int,
+    seed: int,
+) -> dict:
+    kinds = [kind for kind, weight in mix.items() if weight]
+    weights = [mix[kind] for kind in kinds]
+    latencies: dict[str, list[int]] = {kind: [] for kind in kinds}
+    errors = 0
+    remaining = requests
+
+    async def client(number: int) -> None:
+        nonlocal errors, remaining
+        rng = random.Random(seed * 1000 + number)
+        while remaining > 0:
+            remaining -= 1
+            kind = rng.choices(kinds, weights)[0]
+            path = target.path(kind, rng)
+            start = time.perf_counter_ns()
+            try:
+                status = await request(app, path, headers=HEADERS)
+            except Exception:
+                status = 500
+            latencies[kind].append(time.perf_counter_ns() - start)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "errors": errors, "latencies": latencies}
+
+
+def summary(latencies: list[int], elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    result = {"requests": len(ordered), "rps": len(ordered) / elapsed}
+    for p in PERCENTILES:
+        result[f"p{p:g}_ms"] = percentile(ordered, p) / 1e6
+    result["max_ms"] = ordered[-1] / 1e6
+    return result
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no", "."],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{revision}-dirty" if dirty else revision
+
+
+def run_key(result: dict) -> tuple[str, int, str]:
+    return result["mix"], result["concurrency"], result["kind"]
+
+
+def load_baseline(path: str) -> dict[tuple[str, int, str], dict]:
+    with open(path) as file:
+        results = [json.loads(line) for line in file if line.strip()]
+    # The last run of a configuration wins.
+    return {run_key(result): result for result in results}
+
+
+def format_row(result: dict, baseline: dict | None) -> str:
+    row = (
+        f"{result['mix']:<32} {result['concurrency']:>5} {result['kind']:<7} "
+        f"{result['rps']:>10.1f}"
+        + "".join(f" {result[f'p{p:g}_ms']:>8.2f}" for p in PERCENTILES)
+        + f" {result['max_ms']:>8.2f}"
+    )
+    if baseline is not None:
+        rps = result["rps"] / baseline["rps"] - 1
+        p99 = result["p99_ms"] / baseline["p99_ms"] - 1
+        row += f"   req/s {rps:+7.1%}  p99 {p99:+7.1%}"
+    return row
+
+
+async def bench(args: argparse.Namespace) -> list[dict]:
+    import main
+
+    async with main.lifespan(main.app):
+        from content import Article
+
+        missing = args.items - len(await main.store.page(limit=args.items))
+        await main.add_content(
+            Article(f"Article {index}", "Generated for the benchmark", "bench")
+            for index in range(max(missing, 0))
+        )
+        # The search index builds in the background after startup, the
+        # load starts once it is done so it measures the requests alone.
+        await main.search_ready.wait()
+        ids = [item.id for item in await main.store.page(limit=args.items)]
+        static_paths = [
+            main.static_assets.url(name) for name in main.static_assets.assets
+        ]
+        target = Target(ids, static_paths)
+        revision = git_revision()
+        results = []
+        for mix_text, mix in zip(args.mix_text, args.mix):
+            for concurrency in args.concurrency:
+                await load(
+                    main.app, target, mix, concurrency, args.warmup, args.seed
+                )
+                run = await load(
+                    main.app, target, mix, concurrency, args.requests, args.seed
+                )
+                every = [
+                    latency
+                    for latencies in run["latencies"].values()
+                    for latency in latencies
+                ]
+                kinds = {"all": every, **run["latencies"]}
+                for kind, latencies in kinds.items():
+                    if not latencies:
+                        continue
+                    results.append(
+                        {
+                            "revision": revision,
+                            "python": platform.python_version(),
+                            "mix": mix_text,
+                            "concurrency": concurrency,
+                            "kind": kind,
+                            "items": args.items,
+                            "errors": run["errors"] if kind == "all" else None,
+                            **summary(latencies, run["elapsed"]),
+                        }
+                    )
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--mix",
+        nargs="+",
+        default=[DEFAULT_MIX],
+        help=f"request weights per kind, default {DEFAULT_MIX}",
+    )
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="append results to this JSON lines file")
+    parser.add_argument("--compare", help="JSON lines file of an earlier run")
+    args = parser.parse_args()
+    try:
+        args.mix_text = [mix.replace(" ", "") for mix in args.mix]
+        args.mix = [parse_mix(mix) for mix in args.mix_text]
+    except (argparse.ArgumentTypeError, ValueError) as error:
+        parser.error(f"--mix: {error}")
+    baseline = load_baseline(args.compare) if args.compare else {}
+    output = os.path.abspath(args.output) if args.output else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A fresh store per run; set before ``main`` reads it on import.
+        os.environ["CONTENT_DB"] = os.path.join(tmp, "content.sqlite3")
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        sys.path.insert(0, os.getcwd())
+        results = asyncio.run(bench(args))
+
+    print(
+        f"{'mix':<32} {'conc':>5} {'kind':<7} {'req/s':>10}"
+        + "".join(f" {f'p{p:g} ms':>8}" for p in PERCENTILES)
+        + f" {'max ms':>8}"
+    )
+    for result in results:
+        print(format_row(result, baseline.get(run_key(result))))
+    errors = sum(result["errors"] or 0 for result in results)
+    if errors:
+        print(f"{errors} requests failed", file=sys.stderr)
+    if output:
+        with open(output, "a") as file:
+            for result in results:
+                file.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
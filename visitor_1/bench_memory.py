@@ -0,0 +1,60 @@
+"""Bytes per item of the slotted content classes vs the old __dict__ ones.
+
+Loads N articles of each layout and reports traced memory per item. All
+items share the same strings, so the numbers are the object layout alone
+(plus the 8 byte list slot).
+Load times run under tracemalloc and are only comparable to each other.
+
+    python bench_memory.py --count 1000000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from content import Article
+
+
+class DictContent:
+    """``Content`` as it was before ``__slots__``."""
+
+    def __init__(self, title: str, content: str) -> None:
+        self.title = title
+        self.content = content
+        self.id = None
+        self.version = 0
+
+
+class DictArticle(DictContent):
+    def __init__(self, title: str, content: str, author: str) -> None:
+        super().__init__(title, content)
+        self.author = author
+
+
+def measure(cls: type, count: int) -> tuple[float, float]:
+    """Traced bytes per item and seconds to build ``count`` items."""
+    title, content, author = "title", "content", "author"
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [cls(title, content, author) for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return size / count, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'layout':<10} {'bytes/item':>10} {'load s':>8}")
+    for label, cls in (("__dict__", DictArticle), ("__slots__", Article)):
+        per_item, elapsed = measure(cls, args.count)
+        print(f"{label:<10} {per_item:>10.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
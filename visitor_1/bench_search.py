@@ -0,0 +1,186 @@
+"""Build time, memory and query latency of the search index.
+
+Indexes N synthetic articles whose words follow a Zipf distribution over
+a fixed vocabulary, re-indexes a ``--updates`` share of them with new
+text, then times queries of a few kinds:
+
+* rare: one word from the long tail,
+* common: one of the most frequent words, found in most items,
+* two words: a common and a mid-frequency word,
+* three common: three of the fifty most frequent words,
+* prefix: the first three letters of a mid-frequency word,
+* prefix two: the first three letters of a common word and of a
+  mid-frequency one.
+
+For ``--recall-queries`` queries of each kind the results are checked
+against BM25 over every posting of the query terms; recall is the share
+of the exhaustive top ``--limit`` found, counting a hit tied with the
+last exhaustive one as found, and the lowest recall of a kind is shown.
+The run exits with status 1 when a kind's recall is below
+``--min-recall``.
+
+    python bench_search.py --items 10000 100000 1000000
+"""
+import argparse
+import math
+import random
+import resource
+import statistics
+import sys
+import time
+
+from content import Article
+from search_index import B, K1, SearchIndex
+
+MIB = 1024 * 1024
+VOCABULARY = 50_000
+AUTHORS = 1000
+KINDS = ("rare", "common", "two words", "three common", "prefix", "prefix two")
+
+
+def rss() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def make_words(rng: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choices(letters, k=rng.randint(3, 10))))
+    # Sorted first, the order of a set of strings changes between runs.
+    ordered = sorted(words)
+    rng.shuffle(ordered)
+    return ordered
+
+
+def articles(count: int, words: list[str], rng: random.Random):
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(words)):
+        total += 1 / (rank + 1)
+        cum_weights.append(total)
+    for content_id in range(count):
+        title = rng.choices(words, cum_weights=cum_weights, k=rng.randint(3, 8))
+        body = rng.choices(words, cum_weights=cum_weights, k=rng.randint(20, 60))
+        item = Article(
+            " ".join(title), " ".join(body), f"author{rng.randrange(AUTHORS)}"
+        )
+        item.id = content_id
+        yield item
+
+
+def queries(kind: str, words: list[str], rng: random.Random) -> str:
+    if kind == "rare":
+        return rng.choice(words[VOCABULARY // 2 :])
+    if kind == "common":
+        return rng.choice(words[:10])
+    if kind == "two words":
+        return f"{rng.choice(words[:10])} {rng.choice(words[100:1000])}"
+    if kind == "three common":
+        return " ".join(rng.sample(words[:50], 3))
+    if kind == "prefix two":
+        return f"{rng.choice(words[:50])[:3]} {rng.choice(words[100:1000])[:3]}"
+    return rng.choice(words[100:1000])[:3]
+
+
+def exhaustive(index: SearchIndex, query: str) -> dict[int, float]:
+    """BM25 of every live item matching ``query``, by content id."""
+    avg = index.total_len / len(index.docs)
+    scores: dict[int, float] = {}
+    term_ids, _ = index.query_terms(query)
+    for term_id in term_ids:
+        postings = index.postings[term_id]
+        weight = index.idf(postings) * (K1 + 1)
+        for doc, tf in zip(postings, index.freqs[term_id]):
+            if index.alive[doc]:
+                norm = K1 * (1 - B + B * index.doc_lens[doc] / avg)
+                content_id = index.doc_ids[doc]
+                score = weight * tf / (tf + norm)
+                scores[content_id] = scores.get(content_id, 0.0) + score
+    return scores
+
+
+def recall(index: SearchIndex, query: str, limit: int) -> float:
+    scores = exhaustive(index, query)
+    expected = sorted(scores.values(), reverse=True)[:limit]
+    if not expected:
+        return 1.0
+    last = expected[-1]
+    found = 0
+    for content_id, _ in index.search(query, limit):
+        score = scores.get(content_id, 0.0)
+        if score > last or math.isclose(score, last, rel_tol=1e-9):
+            found += 1
+    return found / len(expected)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--recall-queries", type=int, default=20)
+    parser.add_argument("--updates", type=float, default=0.1)
+    parser.add_argument("--min-recall", type=float, default=1.0)
+    args = parser.parse_args()
+
+    words = make_words(random.Random(0))
+    print(
+        f"{'items':>9} {'build s':>8} {'index MiB':>10} {'B/item':>7} "
+        f"{'query':<12} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'recall':>7}"
+    )
+    failed = []
+    for count in args.items:
+        before = rss()
+        start = time.perf_counter()
+        index = SearchIndex()
+        for item in articles(count, words, random.Random(1)):
+            index.add(item)
+        build = time.perf_counter() - start
+        rng = random.Random(3)
+        updated = rng.sample(range(count), int(count * args.updates))
+        for content_id, item in zip(updated, articles(len(updated), words, rng)):
+            item.id = content_id
+            index.add(item)
+        memory = rss() - before
+        for kind in KINDS:
+            rng = random.Random(2)
+            # Untimed first run of the same queries, to warm up caches.
+            for _ in range(args.queries):
+                index.search(queries(kind, words, rng), args.limit)
+            rng = random.Random(2)
+            timings = []
+            for _ in range(args.queries):
+                query = queries(kind, words, rng)
+                query_start = time.perf_counter()
+                index.search(query, args.limit)
+                timings.append(time.perf_counter() - query_start)
+            timings.sort()
+            rng = random.Random(2)
+            recalls = [
+                recall(index, queries(kind, words, rng), args.limit)
+                for _ in range(args.recall_queries)
+            ]
+            lowest = min(recalls, default=1.0)
+            print(
+                f"{count:>9} {build:>8.1f} {memory / MIB:>10.1f} "
+                f"{memory / count:>7.0f} {kind:<12} "
+                f"{statistics.median(timings) * 1000:>7.2f} "
+                f"{timings[int(len(timings) * 0.99)] * 1000:>7.2f} "
+                f"{timings[-1] * 1000:>7.2f} "
+                f"{lowest:>7.3f}"
+            )
+            if lowest < args.min_recall:
+                failed.append(f"{kind} at {count} items")
+        del index
+    if failed:
+        print(f"recall below {args.min_recall:g}: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Cold-start and first-request latency of the site in fresh processes.
+
+Every scenario starts a new interpreter, imports ``main``, optionally runs
+the app lifespan (which precompiles templates) and then times the first
+and second request to a few pages:
+
+* lazy: no lifespan precompile and no bytecode cache, templates compile
+  on the request that needs them (the old behaviour),
+* cold cache: precompile at startup into an empty bytecode cache,
+* warm cache: precompile at startup from the bytecode cache left by the
+  previous scenario, as a pod started after a rollout would.
+
+    python bench_startup.py --runs 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from asgi_client import request
+
+PATHS = ("/", "/content/0", "/content/2", "/content/4", "/content")
+
+
+async def child(precompile: bool) -> dict:
+    start = time.perf_counter()
+    import main
+
+    imported = time.perf_counter()
+    timings = {"import": imported - start}
+    if precompile:
+        lifespan = main.lifespan(main.app)
+        await lifespan.__aenter__()
+    timings["startup"] = time.perf_counter() - start
+    for round_name in ("first", "second"):
+        round_start = time.perf_counter()
+        for path in PATHS:
+            assert await request(main.app, path) == 200, path
+        timings[round_name] = time.perf_counter() - round_start
+    return timings
+
+
+def run_child(precompile: bool, env: dict) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--child"]
+    if precompile:
+        command.append("--precompile")
+    start = time.perf_counter()
+    output = subprocess.run(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    timings = json.loads(output)
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--precompile", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(child(args.precompile))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, CONTENT_DB=os.path.join(tmp, "content.sqlite3"))
+        warm_dir = os.path.join(tmp, "warm")
+        # Seeds the store and fills the warm bytecode cache, so no scenario
+        # pays for either.
+        run_child(True, dict(env, JINJA_BYTECODE_CACHE=warm_dir))
+        scenarios = [
+            ("lazy", False, ""),
+            ("cold cache", True, os.path.join(tmp, "cold")),
+            ("warm cache", True, warm_dir),
+        ]
+        print(
+            f"{'scenario':<12} {'process ms':>11} {'import ms':>10} {'startup ms':>11} "
+            f"{'1st req ms':>11} {'2nd req ms':>11}   ({len(PATHS)} pages, median "
+            f"of {args.runs})"
+        )
+        for label, precompile, cache_dir in scenarios:
+            runs = []
+            for run in range(args.runs):
+                # A fresh directory per run keeps the cold cache cold.
+                run_dir = f"{cache_dir}-{run}" if label == "cold cache" else cache_dir
+                run_env = dict(env, JINJA_BYTECODE_CACHE=run_dir)
+                runs.append(run_child(precompile, run_env))
+            median = {
+                key: statistics.median(timing[key] for timing in runs) * 1000
+                for key in runs[0]
+            }
+            print(
+                f"{label:<12} {median['process']:>11.1f} {median['import']:>10.1f} "
+                f"{median['startup']:>11.1f} {median['first']:>11.2f} "
+                f"{median['second']:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
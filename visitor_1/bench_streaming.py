@@ -0,0 +1,187 @@
+"""TTFB and memory of buffered vs streamed listing pages.
+
+For each size, a fresh process serves a listing of N items two ways,
+both through ``main.app`` with its middleware:
+
+* buffered: all N items loaded, then ``templates.TemplateResponse`` (the
+  old route), added to the app as ``/bench/buffered``,
+* streamed: the current ``/content`` route, ``stream_template`` over
+  ``store.scan()``.
+
+After a few warm-up requests it reports the median and p95 time to first
+body byte and total time over ``--requests`` requests, the page size and
+how far peak RSS rose while serving them.
+
+    python bench_streaming.py --sizes 100 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse
+
+from asgi_client import request
+
+MIB = 1024 * 1024
+
+
+def peak_rss() -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+class BufferedPage(list):
+    """What the listing template got before streaming: a list, all of it."""
+
+    next_after = None
+
+
+async def serve(app, path: str, query: bytes) -> dict:
+    first_byte = None
+    size = 0
+    start = time.perf_counter()
+
+    def on_body(chunk: bytes) -> None:
+        nonlocal first_byte, size
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+
+    await request(app, path, query, on_body=on_body)
+    return {"ttfb": first_byte, "total": time.perf_counter() - start, "bytes": size}
+
+
+async def child(mode: str, size: int, requests: int, warmup: int) -> dict:
+    import main
+    from content import templates
+
+    async with main.lifespan(main.app):
+        if mode == "seed":
+            from content import Article
+
+            missing = size - len(await main.store.page(limit=size))
+            await main.store.add(
+                Article(f"Article {index}", "Generated for the benchmark", "bench")
+                for index in range(missing)
+            )
+            return {}
+
+        async def buffered_listing(request: Request, limit: int = 50):
+            items = BufferedPage(await main.store.page(None, -1, limit))
+            context = {"title": "Content", "items": items, "limit": limit}
+            return templates.TemplateResponse(
+                "listing.html", {"request": request, **context}
+            )
+
+        # Served by the same app as the streamed route, so both modes go
+        # through the same middleware, routing and dependencies.
+        main.app.add_api_route(
+            "/bench/buffered", buffered_listing, response_class=HTMLResponse
+        )
+        # The search index builds in the background after startup, timing
+        # starts once it is done so it measures the listing alone.
+        await main.search_ready.wait()
+        path = "/bench/buffered" if mode == "buffered" else "/content"
+        query = f"limit={size}".encode()
+        for _ in range(warmup):
+            await serve(main.app, path, query)
+        reset_peak_rss()
+        before = peak_rss()
+        results = [await serve(main.app, path, query) for _ in range(requests)]
+        return {
+            "ttfb": [result["ttfb"] for result in results],
+            "total": [result["total"] for result in results],
+            "bytes": results[0]["bytes"],
+            "rss": peak_rss() - before,
+        }
+
+
+def run_child(mode: str, size: int, args: argparse.Namespace, env: dict) -> dict:
+    output = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--child",
+            mode,
+            str(size),
+            f"--requests={args.requests}",
+            f"--warmup={args.warmup}",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def p95(values: list[float]) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, size = args.child
+        result = asyncio.run(child(mode, int(size), args.requests, args.warmup))
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            CONTENT_DB=os.path.join(tmp, "content.sqlite3"),
+            JINJA_BYTECODE_CACHE=os.path.join(tmp, "jinja"),
+        )
+        run_child("seed", max(args.sizes), args, env)
+        print(
+            f"{'items':>8} {'mode':<9} {'TTFB p50':>9} {'TTFB p95':>9} "
+            f"{'total p50':>10} {'total p95':>10} {'page MiB':>9} "
+            f"{'peak RSS+ MiB':>14}   (ms, {args.requests} requests after "
+            f"{args.warmup} warm-up)"
+        )
+        for size in args.sizes:
+            for mode in ("buffered", "streamed"):
+                result = run_child(mode, size, args, env)
+                ttfb = [value * 1000 for value in result["ttfb"]]
+                total = [value * 1000 for value in result["total"]]
+                print(
+                    f"{size:>8} {mode:<9} {statistics.median(ttfb):>9.2f} "
+                    f"{p95(ttfb):>9.2f} {statistics.median(total):>10.1f} "
+                    f"{p95(total):>10.1f} {result['bytes'] / MIB:>9.2f} "
+                    f"{result['rss'] / MIB:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import asyncio
+import os
+
+import pytest
+
+from content_store import ContentStore
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    """``main`` on an empty store of its own, for a test to run in
+    ``asyncio.run()``.
+    """
+    monkeypatch.chdir(os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    monkeypatch.setattr(main, "store", ContentStore(str(tmp_path / "content.db")))
+    # Both are bound to the first event loop that waits on them.
+    monkeypatch.setattr(main, "search_ready", asyncio.Event())
+    monkeypatch.setattr(main, "search_slot", asyncio.Semaphore(1))
+    return main
@@ -1,10 +1,147 @@
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi.responses import StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi import Request
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_DIR = "templates"
+# Compiled templates are kept here across restarts, empty disables it.
+BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE", ".jinja-cache")
+
+
+# Streamed responses start with a small chunk to get the first byte out,
+# later ones are bigger so there are few sends per page.
+FIRST_CHUNK_SIZE = 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+def bytecode_cache(subdir: str = "") -> FileSystemBytecodeCache | None:
+    if not BYTECODE_CACHE_DIR:
+        return None
+    directory = os.path.join(BYTECODE_CACHE_DIR, subdir)
+    os.makedirs(directory, exist_ok=True)
+    return FileSystemBytecodeCache(directory)
+
+
+# The one template environment of the site, main.py renders through it too.
+# Templates are not re-checked on disk per render unless JINJA_AUTO_RELOAD=1.
+templates = Jinja2Templates(
+    directory=TEMPLATE_DIR,
+    bytecode_cache=bytecode_cache(),
+    auto_reload=os.environ.get("JINJA_AUTO_RELOAD") == "1",
+)
+
+
+# The same environment compiled for generate_async(), sharing loader, filters
+# and globals. Bytecode cache keys do not tell sync and async code apart, so
+# it caches into a directory of its own.
+async_env = templates.env.overlay(
+    enable_async=True, bytecode_cache=bytecode_cache("async")
+)
+
+
+def precompile_templates() -> list[str]:
+    """Compile every template now rather than on the request that needs it."""
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.get_template(name)
+        async_env.get_template(name)
+    return names
+
+
+def stream_template(
+    name: str, context: dict, status_code: int = 200
+) -> StreamingResponse:
+    """Like ``templates.TemplateResponse``, but sent while it renders.
+
+    Async iterables in ``context`` are consumed as the template loops over
+    them, so a long page never sits in memory in full, neither as HTML nor
+    as the items it lists.
+    """
+    template = async_env.get_template(name)
+
+    async def body():
+        parts: list[str] = []
+        size = 0
+        threshold = FIRST_CHUNK_SIZE
+        async for part in template.generate_async(context):
+            parts.append(part)
+            size += len(part)
+            if size >= threshold:
+                yield "".join(parts).encode()
+                parts.clear()
+                size = 0
+                threshold = STREAM_CHUNK_SIZE
+        if parts:
+            yield "".join(parts).encode()
+
+    return StreamingResponse(body(), status_code=status_code, media_type="text/html")
+
 
-templates = Jinja2Templates(directory="templates")
+@dataclass(frozen=True)
+class ContentType:
+    template: str
+    # A private copy, merged into every page context, never changed.
+    context: Mapping[str, Any] = field(default_factory=dict)
+
+
+# Content subclass -> how to render it, filled by Content.__init_subclass__.
+content_types: dict[type, ContentType] = {}
+# Class name -> registered Content subclass, for loading stored items.
+content_classes: dict[str, type] = {}
+
+
+def content_class(name: str) -> type:
+    try:
+        return content_classes[name]
+    except KeyError:
+        raise LookupError(f"unknown content type {name!r}") from None
 
 
 class Content:
+    """Base of everything the site can show.
+
+    Subclasses register themselves with their template and an optional
+    context shared by all items of the type::
+
+        class Podcast(Content, template="podcast.html", context={"player": "mini"}):
+            ...
+
+    A subclass without ``template`` or ``context`` takes it from its parent.
+    Item fields from ``render()`` win over the shared context.
+
+    Items are kept in ``__slots__``. The slots a subclass declares are
+    its ``fields`` on top of its parent's, which ``update()`` may change,
+    ``render()`` returns and the store saves, so a subclass only declares
+    them.
+    """
+
+    def __init_subclass__(
+        cls,
+        template: str | None = None,
+        context: Mapping[str, Any] | None = None,
+        **kwargs,
+    ) -> None:
+        super().__init_subclass__(**kwargs)
+        cls.fields = cls.__base__.fields + cls.__dict__.get("__slots__", ())
+        parent = content_types.get(cls.__base__)
+        if template is None and parent is None:
+            return
+        if template is None:
+            template = parent.template
+        if context is None:
+            context = parent.context if parent else {}
+        content_types[cls] = ContentType(template, dict(context))
+        content_classes[cls.__name__] = cls
+
+    # What update() may change, the keys of render().
+    fields: tuple[str, ...] = ("title", "content")
+    __slots__ = (*fields, "id", "version")
+
     def __init__(
         self,
         title: str,
@@ -12,12 +149,25 @@ class Content:
     ) -> None:
         self.title: str = title
         self.content: str = content
+        self.id: int | None = None
+        self.version: int = 0
+
+    def update(self, **fields) -> None:
+        """Change fields and bump ``version`` so cached pages go stale."""
+        for name, value in fields.items():
+            if name not in self.fields:
+                raise AttributeError(f"{type(self).__name__} has no field {name!r}")
+            setattr(self, name, value)
+        self.version += 1
 
-    def render(self):
-        pass
+    def render(self) -> dict[str, Any]:
+        """A new dict of the item's ``fields``, the caller may keep or change it."""
+        return {name: getattr(self, name) for name in self.fields}
 
 
-class Article(Content):
+class Article(Content, template="article.html"):
+    __slots__ = ("author",)
+
     def __init__(
         self,
         title: str,
@@ -27,15 +177,10 @@ class Article(Content):
         super().__init__(title, content)
         self.author: str = author
 
-    def render(self):
-        return {
-            "author": self.author,
-            "content": self.content,
-            "title": self.title,
-        }
 
+class Video(Content, template="video.html"):
+    __slots__ = ("duration",)
 
-class Video(Content):
     def __init__(
         self,
         title: str,
@@ -45,15 +190,10 @@ class Video(Content):
         super().__init__(title, content)
         self.duration = duration
 
-    def render(self):
-        return {
-            "duration": self.duration,
-            "content": self.content,
-            "title": self.title,
-        }
 
+class Image(Content, template="image.html"):
+    __slots__ = ("resolution",)
 
-class Image(Content):
     def __init__(
         self,
         title: str,
@@ -63,27 +203,27 @@ class Image(Content):
         super().__init__(title, content)
         self.resolution = resolution
 
-    def render(self):
-        return {
-            "resolution": self.resolution,
-            "content": self.content,
-            "title": self.title,
-        }
+
+def page_context(content_type: ContentType, item: Content) -> dict[str, Any]:
+    """Template context of ``item``: its fields over the shared context."""
+    content_context = item.render()
+    if content_type.context:
+        content_context = {**content_type.context, **content_context}
+    return content_context
+
+
+def render_page(item: Content) -> str:
+    """HTML of ``item``'s page, which does not depend on the request."""
+    content_type = content_types[type(item)]
+    content_context = page_context(content_type, item)
+    return templates.get_template(content_type.template).render(content_context)
 
 
 def handle_content(item: Content, request: Request):
-    template_name = ""
-    content_context = {"request": request}
-    if isinstance(item, Article):
-        template_name = "article.html"
-        content_context = content_context | item.render()
-    elif isinstance(item, Video):
-        template_name = "video.html"
-        content_context = content_context | item.render()
-    elif isinstance(item, Image):
-        template_name = "image.html"
-        content_context = content_context | item.render()
+    content_type = content_types[type(item)]
+    content_context = page_context(content_type, item)
+    content_context["request"] = request
     return templates.TemplateResponse(
-        name=template_name,
+        name=content_type.template,
         context=content_context,
     )
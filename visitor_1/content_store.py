@@ -0,0 +1,175 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from typing import AsyncIterator, Iterable
+
+from content import Content, content_class
+
+# Stay below SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds (999).
+MAX_PARAMS = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS content_type_id ON content (type, id);
+"""
+
+
+class ContentStore:
+    """Content items in SQLite, looked up one row or one page at a time.
+
+    Queries run in worker threads via ``asyncio.to_thread`` so the event
+    loop never waits on disk. Each thread keeps its own connection.
+    Rows come back as ``Content`` instances with ``id`` and ``version``
+    set from the table.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.local.conn = conn
+        return conn
+
+    @staticmethod
+    def to_item(row: tuple) -> Content:
+        content_id, type_name, fields, version = row
+        item = content_class(type_name)(**json.loads(fields))
+        item.id = content_id
+        item.version = version
+        return item
+
+    def _get(self, content_id: int) -> Content | None:
+        row = (
+            self.connection()
+            .execute(
+                "SELECT id, type, fields, version FROM content WHERE id = ?",
+                (content_id,),
+            )
+            .fetchone()
+        )
+        return self.to_item(row) if row else None
+
+    def _get_many(self, ids: list[int], type_name: str | None) -> list[Content]:
+        found = {}
+        conn = self.connection()
+        for start in range(0, len(ids), MAX_PARAMS):
+            chunk = ids[start : start + MAX_PARAMS]
+            sql = (
+                "SELECT id, type, fields, version FROM content "
+                f"WHERE id IN ({', '.join('?' * len(chunk))})"
+            )
+            params = list(chunk)
+            if type_name is not None:
+                sql += " AND type = ?"
+                params.append(type_name)
+            for row in conn.execute(sql, params):
+                found[row[0]] = self.to_item(row)
+        return [found[content_id] for content_id in ids if content_id in found]
+
+    def _page(self, type_name: str | None, after: int, limit: int) -> list[Content]:
+        if type_name is None:
+            sql = (
+                "SELECT id, type, fields, version FROM content "
+                "WHERE id > ? ORDER BY id LIMIT ?"
+            )
+            params: tuple = (after, limit)
+        else:
+            sql = (
+                "SELECT id, type, fields, version FROM content "
+                "WHERE type = ? AND id > ? ORDER BY id LIMIT ?"
+            )
+            params = (type_name, after, limit)
+        return [self.to_item(row) for row in self.connection().execute(sql, params)]
+
+    def _empty(self) -> bool:
+        row = self.connection().execute("SELECT 1 FROM content LIMIT 1").fetchone()
+        return row is None
+
+    def _add(self, items: Iterable[Content]) -> list[int]:
+        with self.connection() as conn:
+            ids = []
+            for item in items:
+                cursor = conn.execute(
+                    "INSERT INTO content (id, type, fields) VALUES (?, ?, ?)",
+                    (item.id, type(item).__name__, json.dumps(item.render())),
+                )
+                item.id = cursor.lastrowid
+                ids.append(item.id)
+            return ids
+
+    def _update(self, content_id: int, fields: dict) -> Content | None:
+        with self.connection() as conn:
+            # Take the write lock before reading, or two updates of one item
+            # both read the old fields and the second write drops the first.
+            conn.execute("BEGIN IMMEDIATE")
+            item = self._get(content_id)
+            if item is None:
+                return None
+            item.update(**fields)
+            conn.execute(
+                "UPDATE content SET fields = ?, version = version + 1 WHERE id = ?",
+                (json.dumps(item.render()), content_id),
+            )
+            return self._get(content_id)
+
+    async def get(self, content_id: int) -> Content | None:
+        return await asyncio.to_thread(self._get, content_id)
+
+    async def get_many(
+        self, ids: list[int], type_name: str | None = None
+    ) -> list[Content]:
+        """Items among ``ids`` (of one type if given) in the order asked for.
+
+        Missing ids are left out, repeated ones come back repeated.
+        """
+        return await asyncio.to_thread(self._get_many, ids, type_name)
+
+    async def page(
+        self, type_name: str | None = None, after: int = -1, limit: int = 50
+    ) -> list[Content]:
+        """Up to ``limit`` items with ids above ``after``, oldest first."""
+        return await asyncio.to_thread(self._page, type_name, after, limit)
+
+    async def scan(
+        self,
+        type_name: str | None = None,
+        after: int = -1,
+        limit: int | None = None,
+        chunk_size: int = 500,
+    ) -> AsyncIterator[Content]:
+        """Like ``page()`` without a size cap, reading ``chunk_size`` rows at a time."""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            items = await self.page(type_name, after, size)
+            for item in items:
+                yield item
+            if len(items) < size:
+                return
+            after = items[-1].id
+            if remaining is not None:
+                remaining -= len(items)
+
+    async def empty(self) -> bool:
+        return await asyncio.to_thread(self._empty)
+
+    async def add(self, items: Iterable[Content]) -> list[int]:
+        """Insert items in one transaction; ``item.id`` None means next free id."""
+        return await asyncio.to_thread(self._add, list(items))
+
+    async def update(self, content_id: int, **fields) -> Content | None:
+        return await asyncio.to_thread(self._update, content_id, fields)
@@ -0,0 +1,155 @@
+"""Resized WebP variants of the static images, for ``srcset``.
+
+Each source image gets one WebP per width in ``WIDTHS`` below its own
+width (the source itself stays the widest candidate), named after the
+source hash, e.g. ``kitty.52016b555a26625e.640w.webp``, next to the
+hashed files of ``static_assets.build()``. A small JSON manifest per
+source hash records what was written, so a restart only decodes images
+that are new or changed. Encoding runs in a process pool since it is
+CPU bound.
+
+Needs Pillow, the ``images`` extra; without it ``build_variants()``
+returns nothing and pages keep plain ``src`` attributes, as do images
+Pillow cannot decode.
+"""
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from static_assets import BUILD_DIR, Asset, temp_path, write_once
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1024, 1600)
+FORMAT = "webp"
+QUALITY = 80
+RESIZABLE = {"image/jpeg", "image/png", "image/webp"}
+
+# (width, file name relative to the build directory)
+Variant = tuple[int, str]
+
+
+def variant_name(asset: Asset, width: int) -> str:
+    stem = asset.hashed_name.rpartition(".")[0]
+    return f"{stem}.{width}w.{FORMAT}"
+
+
+def manifest_path(asset: Asset, build_dir: str) -> str:
+    stem = asset.hashed_name.rpartition(".")[0]
+    return os.path.join(build_dir, f"{stem}.variants.json")
+
+
+def generate(asset: Asset, build_dir: str) -> list[Variant] | str:
+    """Write the variants of one source image, runs in a pool worker.
+
+    An image Pillow cannot read gives the error message instead, so one
+    bad file does not fail the whole build.
+    """
+    try:
+        return write_variants(asset, build_dir)
+    except (OSError, ValueError, PILImage.DecompressionBombError) as error:
+        return f"{type(error).__name__}: {error}"
+
+
+def write_variants(asset: Asset, build_dir: str) -> list[Variant]:
+    variants = []
+    with PILImage.open(asset.files["identity"]) as image:
+        image.load()
+        for width in WIDTHS:
+            if width >= image.width:
+                break
+            height = round(image.height * width / image.width)
+            name = variant_name(asset, width)
+            path = os.path.join(build_dir, name)
+            if not os.path.exists(path):
+                resized = image.resize((width, height), PILImage.Resampling.LANCZOS)
+                tmp = temp_path(path)
+                try:
+                    resized.save(tmp, FORMAT, quality=QUALITY, method=6)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+            variants.append((width, name))
+        variants.append((image.width, asset.hashed_name))
+    write_once(manifest_path(asset, build_dir), json.dumps(variants).encode())
+    return variants
+
+
+def load_manifest(asset: Asset, build_dir: str) -> list[Variant] | None:
+    try:
+        with open(manifest_path(asset, build_dir)) as file:
+            variants = [tuple(variant) for variant in json.load(file)]
+    except FileNotFoundError:
+        return None
+    if not all(os.path.exists(os.path.join(build_dir, name)) for _, name in variants):
+        return None
+    return variants
+
+
+def build_variants(
+    assets: dict[str, Asset],
+    build_dir: str = BUILD_DIR,
+    max_workers: int | None = None,
+) -> dict[str, list[tuple[int, Asset]]]:
+    """Variants of every resizable asset by its name, widest last.
+
+    The widest one is the source itself at full size.
+    """
+    if PILImage is None:
+        logger.warning("Pillow is not installed, not generating image variants")
+        return {}
+    done: dict[str, list[Variant]] = {}
+    todo = []
+    for asset in assets.values():
+        if asset.media_type not in RESIZABLE:
+            continue
+        variants = load_manifest(asset, build_dir)
+        if variants is None:
+            todo.append(asset)
+        else:
+            done[asset.name] = variants
+    if todo:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            results = pool.map(generate, todo, [build_dir] * len(todo))
+            for asset, variants in zip(todo, results):
+                if isinstance(variants, str):
+                    logger.warning("No variants of %s: %s", asset.name, variants)
+                else:
+                    done[asset.name] = variants
+    return {
+        name: [
+            (width, variant_asset(assets[name], width, file_name, build_dir))
+            for width, file_name in variants
+        ]
+        for name, variants in done.items()
+    }
+
+
+def variant_asset(source: Asset, width: int, file_name: str, build_dir: str) -> Asset:
+    if file_name == source.hashed_name:
+        return source
+    return Asset(
+        name=file_name,
+        hashed_name=file_name,
+        digest=f"{source.digest}-{width}w",
+        media_type=f"image/{FORMAT}",
+        files={"identity": os.path.join(build_dir, file_name)},
+    )
+
+
+if __name__ == "__main__":
+    from static_assets import build
+
+    for name, variants in build_variants(build()).items():
+        print(f"{name}: {', '.join(asset.name for _, asset in variants) or '-'}")
@@ -1,16 +1,30 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from typing import Sequence
-from content import Content, Article, Video, Image, handle_content
+import asyncio
+import os
+from contextlib import asynccontextmanager, suppress
 
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="static"), name="static")
+from fastapi import Body, Depends, FastAPI, Query, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from typing import AsyncIterator, Iterable, Sequence
+from content import (
+    Content,
+    Article,
+    Video,
+    Image,
+    content_classes,
+    precompile_templates,
+    render_page,
+    stream_template,
+    templates,
+)
+from content_store import ContentStore
+from fast_json import JSONBytesResponse, dumps
+from page_cache import Page, PageCache, etag_matches
+from image_variants import build_variants
+from metrics import Metrics, TimingMiddleware, stamp
+from search_index import SearchIndex
+from static_assets import StaticAssets, build
 
-templates = Jinja2Templates(directory="templates")
-
-# TODO: Someone should probably store it in the databases.
+# Demo items written to an empty store on startup.
 articles = [
     Article(
         title="Article 1: Why you should use type-hints",
@@ -50,12 +64,214 @@ images = [
     ),
 ]
 
-all_content: Sequence[Content] = articles + videos + images
+seed_content: Sequence[Content] = articles + videos + images
+for content_id, item in enumerate(seed_content):
+    item.id = content_id
+
+store = ContentStore(os.environ.get("CONTENT_DB", "content.sqlite3"))
+page_cache = PageCache(maxsize=1024)
+static_assets = StaticAssets()
+metrics = Metrics()
+search_index = SearchIndex()
+search_ready = asyncio.Event()
+# Queries are CPU bound, so they run in a worker thread to keep the loop
+# serving, one at a time as more threads would only fight over the GIL.
+search_slot = asyncio.Semaphore(1)
+templates.env.filters["static_url"] = static_assets.rewrite
+templates.env.filters["srcset"] = static_assets.srcset
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    assets = await asyncio.to_thread(build)
+    variants = await asyncio.to_thread(build_variants, assets)
+    static_assets.load(assets, variants)
+    # Cached pages point at asset URLs that may have changed with the build.
+    page_cache.clear()
+    precompile_templates()
+    if await store.empty():
+        await store.add(seed_content)
+    # Indexing every item takes long on a big store, /search answers 503
+    # until it is done while the rest of the app already serves.
+    search_index.clear()
+    search_ready.clear()
+    indexing = asyncio.create_task(index_store())
+    try:
+        yield
+    finally:
+        indexing.cancel()
+        with suppress(asyncio.CancelledError):
+            await indexing
+
+
+async def index_store() -> None:
+    # Small chunks keep the event loop free between them.
+    async for item in store.scan(chunk_size=100):
+        # Ids written since the scan started are indexed already, with
+        # fields at least as new as the ones read here.
+        if item.id not in search_index.docs:
+            search_index.add(item)
+    search_ready.set()
+
+
+async def mark_routed(request: Request) -> None:
+    stamp(request, "routed")
+
+
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(mark_routed)])
+app.add_middleware(TimingMiddleware, metrics=metrics)
+app.mount("/static", static_assets, name="static")
+
+
+async def content_page(content_id: int, request: Request) -> Page | None:
+    """Rendered page of an item, from the cache until the item changes."""
+    page = page_cache.get(content_id)
+    if page is None:
+        item = await store.get(content_id)
+        if item is None:
+            return None
+        stamp(request, "looked_up")
+        page = page_cache.put(content_id, item.version, render_page(item).encode())
+        stamp(request, "rendered")
+    else:
+        stamp(request, "looked_up")
+    return page
+
+
+# The site has no write routes. Code that adds or changes content while the
+# app runs (imports, benchmarks) calls these rather than the store, so the
+# search index and the page cache follow.
+async def add_content(items: Iterable[Content]) -> list[int]:
+    items = list(items)
+    ids = await store.add(items)
+    for item in items:
+        search_index.add(item)
+    return ids
+
+
+async def update_content(content_id: int, **fields) -> Content | None:
+    """Change fields of a stored item, None if there is no such item."""
+    item = await store.update(content_id, **fields)
+    if item is not None:
+        search_index.add(item)
+        page_cache.invalidate(content_id, item.version)
+    return item
+
+
+# Ids per request of the JSON endpoint, the NDJSON one streams up to
+# MAX_STREAM_IDS and reads the store STREAM_CHUNK ids at a time.
+MAX_BULK_IDS = 1000
+MAX_STREAM_IDS = 100_000
+STREAM_CHUNK = 500
+
+
+def content_data(item: Content) -> dict:
+    return {"id": item.id, "type": type(item).__name__, **item.render()}
+
+
+def bulk_error(ids: list[int], type: str | None, limit: int) -> Response | None:
+    if len(ids) > limit:
+        return JSONBytesResponse(
+            {"detail": f"at most {limit} ids per request"}, status_code=422
+        )
+    if type is not None and type not in content_classes:
+        return JSONBytesResponse({"detail": "Unknown content type"}, status_code=404)
+    return None
+
+
+async def bulk_content(ids: list[int], type: str | None) -> Response:
+    if error := bulk_error(ids, type, MAX_BULK_IDS):
+        return error
+    items = await store.get_many(ids, type)
+    found = {item.id for item in items}
+    return JSONBytesResponse(
+        {
+            "items": [content_data(item) for item in items],
+            "missing": [content_id for content_id in ids if content_id not in found],
+        }
+    )
+
+
+async def stream_content(ids: list[int], type: str | None) -> Response:
+    if error := bulk_error(ids, type, MAX_STREAM_IDS):
+        return error
+
+    async def lines():
+        for start in range(0, len(ids), STREAM_CHUNK):
+            items = await store.get_many(ids[start : start + STREAM_CHUNK], type)
+            if items:
+                yield b"".join(dumps(content_data(item)) + b"\n" for item in items)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/content")
+async def get_content_bulk(
+    ids: list[int] = Query(..., description="repeat for every item: ids=1&ids=2"),
+    type: str | None = None,
+):
+    """Items as JSON, with the requested ids that were not found."""
+    return await bulk_content(ids, type)
+
+
+@app.post("/api/content")
+async def post_content_bulk(
+    ids: list[int] = Body(...), type: str | None = Body(None)
+):
+    """Same as the GET variant, for id lists too long for a URL."""
+    return await bulk_content(ids, type)
+
+
+@app.get("/api/content/stream")
+async def get_content_stream(
+    ids: list[int] = Query(...),
+    type: str | None = None,
+):
+    """Items as newline-delimited JSON, streamed while they are read."""
+    return await stream_content(ids, type)
+
+
+@app.post("/api/content/stream")
+async def post_content_stream(
+    ids: list[int] = Body(...), type: str | None = Body(None)
+):
+    return await stream_content(ids, type)
+
+
+class ListingPage:
+    """Items of a listing page, read while the template iterates over them.
+
+    ``next_after`` is known once the iteration is over, which is where the
+    template uses it.
+    """
+
+    def __init__(self, items: AsyncIterator[Content], limit: int) -> None:
+        self.items = items
+        self.limit = limit
+        self.count = 0
+        self.last_id: int | None = None
+
+    async def __aiter__(self) -> AsyncIterator[Content]:
+        async for item in self.items:
+            self.count += 1
+            self.last_id = item.id
+            yield item
+
+    @property
+    def next_after(self) -> int | None:
+        return self.last_id if self.count == self.limit else None
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    return PlainTextResponse(
+        metrics.exposition(), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse(
+    return stream_template(
         "index.html",
         {
             "request": request,
@@ -65,11 +281,71 @@ async def read_root(request: Request):
     )
 
 
+@app.get("/content", response_class=HTMLResponse)
+async def list_content(
+    request: Request,
+    type: str | None = Query(None, description="content type, e.g. Article"),
+    after: int = Query(-1, description="id of the last item on the previous page"),
+    limit: int = Query(50, ge=1, le=100_000),
+):
+    if type is not None and type not in content_classes:
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "title": "Error", "content": "Unknown content type"},
+            status_code=404,
+        )
+    return stream_template(
+        "listing.html",
+        {
+            "request": request,
+            "title": "Content",
+            "items": ListingPage(store.scan(type, after, limit), limit),
+            "type": type,
+            "limit": limit,
+        },
+    )
+
+
+@app.get("/search", response_class=HTMLResponse)
+async def search(
+    request: Request,
+    q: str = Query("", description="words to find, also as the start of longer ones"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    if not search_ready.is_set():
+        return templates.TemplateResponse(
+            "index.html",
+            {
+                "request": request,
+                "title": "Search",
+                "content": "Search is starting up, try again in a moment",
+            },
+            status_code=503,
+            headers={"Retry-After": "5"},
+        )
+    async with search_slot:
+        hits = await asyncio.to_thread(search_index.search, q, limit)
+    items = await store.get_many([content_id for content_id, _ in hits])
+    return templates.TemplateResponse(
+        "search.html",
+        {
+            "request": request,
+            "title": "Search",
+            "query": q,
+            "items": items,
+            "truncated": hits.truncated,
+        },
+    )
+
+
 @app.get("/content/{content_id}", response_class=HTMLResponse)
 async def read_content(content_id: int, request: Request):
-    if 0 <= content_id < len(all_content):
-        item = all_content[content_id]
-        return handle_content(item, request)
+    page = await content_page(content_id, request)
+    if page is not None:
+        headers = {"ETag": page.etag}
+        if etag_matches(request.headers.get("if-none-match"), page.etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(page.body, headers=headers)
     else:
         return templates.TemplateResponse(
             "index.html",
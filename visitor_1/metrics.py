@@ -0,0 +1,178 @@
+"""Per-route, per-phase request latency.
+
+``TimingMiddleware`` times every HTTP request in phases:
+
+* routing: middleware entry until the endpoint starts (routing plus
+  parameter parsing),
+* lookup: finding the content (store, page cache),
+* render: building the page when it was not cached,
+* write: the first response message until the last one,
+* total: all of it.
+
+Endpoints mark where their phases end with ``stamp(request, "looked_up")``
+and ``stamp(request, "rendered")``; phases an endpoint does not mark are
+not recorded. The app phases go out in a ``Server-Timing`` header and
+every phase is added to a fixed-bucket histogram exposed by
+``Metrics.exposition()`` in the Prometheus text format.
+
+Timestamps are ``perf_counter_ns`` integers and a histogram update is one
+bisect into preallocated counters. Per request the middleware allocates
+a slotted ``Timings`` and the header value, cheap enough to stay on in
+production.
+"""
+from array import array
+from bisect import bisect_left
+from time import perf_counter_ns
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PHASES = ("routing", "lookup", "render", "write", "total")
+# Upper bounds in nanoseconds, +Inf is implied.
+BUCKETS_NS = tuple(
+    int(seconds * 1e9)
+    for seconds in (
+        0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+        0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    )
+)  # fmt: skip
+METRIC = "visitor_request_phase_seconds"
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = array("Q", bytes(8 * (len(BUCKETS_NS) + 1)))
+        self.sum = 0
+        self.count = 0
+
+    def record(self, value: int) -> None:
+        self.counts[bisect_left(BUCKETS_NS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Timings:
+    """Timestamps of one request, kept in the scope under ``"timings"``."""
+
+    __slots__ = ("start", "routed", "looked_up", "rendered", "response_start", "end")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.routed = 0
+        self.looked_up = 0
+        self.rendered = 0
+        self.response_start = 0
+        self.end = 0
+
+    def phases(self) -> tuple[int, int, int, int, int]:
+        """Nanoseconds per entry of ``PHASES``, -1 where not measured."""
+        routing = self.routed - self.start if self.routed else -1
+        lookup = self.looked_up - self.routed if self.looked_up and self.routed else -1
+        render = (
+            self.rendered - self.looked_up if self.rendered and self.looked_up else -1
+        )
+        write = self.end - self.response_start if self.end else -1
+        return routing, lookup, render, write, self.end - self.start
+
+
+def stamp(request: Request, name: str) -> None:
+    """Mark the end of a phase, no-op when the middleware is not installed."""
+    timings = request.scope.get("timings")
+    if timings is not None:
+        setattr(timings, name, perf_counter_ns())
+
+
+def route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return scope.get("root_path") or "unmatched"
+
+
+class Metrics:
+    def __init__(self) -> None:
+        # route -> one histogram per entry of PHASES
+        self.routes: dict[str, list[Histogram]] = {}
+
+    def record(self, route: str, timings: Timings) -> None:
+        histograms = self.routes.get(route)
+        if histograms is None:
+            histograms = self.routes[route] = [Histogram() for _ in PHASES]
+        for histogram, value in zip(histograms, timings.phases()):
+            if value >= 0:
+                histogram.record(value)
+
+    def exposition(self) -> str:
+        lines = [
+            f"# HELP {METRIC} Request latency by route and phase.",
+            f"# TYPE {METRIC} histogram",
+        ]
+        bounds = [f"{bound / 1e9:g}" for bound in BUCKETS_NS] + ["+Inf"]
+        for route, histograms in sorted(self.routes.items()):
+            route_label = route.replace("\\", "\\\\").replace('"', '\\"')
+            for phase, histogram in zip(PHASES, histograms):
+                if not histogram.count:
+                    continue
+                labels = f'route="{route_label}",phase="{phase}"'
+                cumulative = 0
+                for bound, bucket_count in zip(bounds, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{METRIC}_sum{{{labels}}} {histogram.sum / 1e9}")
+                lines.append(f"{METRIC}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware, so it adds no task or body buffering per request."""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = Timings(perf_counter_ns())
+        scope["timings"] = timings
+
+        async def send_timed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                timings.response_start = perf_counter_ns()
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"server-timing", server_timing(timings)),
+                ]
+            elif not message.get("more_body", False):
+                await send(message)
+                timings.end = perf_counter_ns()
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            if not timings.end:
+                timings.end = perf_counter_ns()
+            self.metrics.record(route_name(scope), timings)
+
+
+def server_timing(timings: Timings) -> bytes:
+    """``Server-Timing`` value for the phases done before the response starts."""
+    parts = []
+    previous = timings.start
+    for name, mark in (
+        ("routing", timings.routed),
+        ("lookup", timings.looked_up),
+        ("render", timings.rendered),
+    ):
+        if mark:
+            parts.append(f"{name};dur={(mark - previous) / 1e6:.3f}")
+            previous = mark
+    parts.append(f"app;dur={(timings.response_start - timings.start) / 1e6:.3f}")
+    return ", ".join(parts).encode()
@@ -0,0 +1,71 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Page:
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag: same bytes, same tag."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """``If-None-Match`` check, which uses the weak comparison (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+class PageCache:
+    """LRU of rendered pages by content id, each with the content version
+    it was rendered from.
+
+    ``invalidate()`` drops an item's page when the item changes. It keeps
+    the new version in its place, so a render of the old version that was
+    still running is not cached after it.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        # content id -> (version, page), no page after invalidate()
+        self.pages: OrderedDict[int, tuple[int, Page | None]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_id: int) -> Page | None:
+        _, page = self.pages.get(content_id, (0, None))
+        if page is None:
+            self.misses += 1
+            return None
+        self.pages.move_to_end(content_id)
+        self.hits += 1
+        return page
+
+    def put(self, content_id: int, version: int, body: bytes) -> Page:
+        page = Page(body, make_etag(body))
+        cached_version, _ = self.pages.get(content_id, (version, None))
+        if version >= cached_version:
+            self.store(content_id, version, page)
+        return page
+
+    def invalidate(self, content_id: int, version: int) -> None:
+        """Drop the page of ``content_id``, which changed to ``version``."""
+        self.store(content_id, version, None)
+
+    def store(self, content_id: int, version: int, page: Page | None) -> None:
+        self.pages[content_id] = (version, page)
+        self.pages.move_to_end(content_id)
+        while len(self.pages) > self.maxsize:
+            self.pages.popitem(last=False)
+
+    def clear(self) -> None:
+        self.pages.clear()
@@ -0,0 +1,811 @@
+"""In-memory full-text index over the ``title``, ``content`` and ``author``
+of content items, ranked with BM25.
+
+Each term has an ``array("I")`` of the docs it is in, in doc order, and
+one of its frequency in each. Doc numbers are dense internal ones that
+``doc_ids`` maps back to content ids, so adding an item only appends.
+Indexing an id again (an update) gives the item a new doc number and marks
+the old one dead; dead postings are skipped by queries and dropped when
+the index is rebuilt at startup.
+
+Every query word of ``MIN_PREFIX`` letters or more also matches the
+``MAX_EXPANSIONS`` most frequent indexed words it is a prefix of, and only
+the first ``MAX_QUERY_WORDS`` words are searched; ``Hits.truncated`` tells
+when a query lost words or matches to these limits. Over the terms that
+are searched, results are the same as scoring every posting.
+
+The impact of a term on a doc only grows with the term's frequency in it
+and only shrinks with the doc's length, so both are put in classes
+(``CLASS_BOUNDS``) and a pair of classes bounds the impact of its docs
+whatever the average length is. Terms with long postings also keep their
+docs in buckets by those classes. A query scores short postings in full up
+front and finds the docs with more than one of its long terms with ``set``
+operations, then reads the buckets best bound first until no doc left can
+beat the top results.
+
+Terms found in more than one doc in ``DENSE`` would be read for most of
+their postings that way. They keep, per length class, bitmaps of the docs
+of the class (by their number in it) with the term in each frequency class
+or a higher one. ``&`` and ``^`` of these big ints split the docs of a
+class into groups by the frequency classes of every dense term of a query
+and drop the groups that cannot score above a threshold, whatever their
+other terms. The threshold starts below the best bound and goes down until
+the top results are above it. Classes are too coarse to tell apart the top
+docs of the most common words, so dense terms also keep their shortest docs
+per frequency: a query scores the best of these first, and the next one
+bounds what the term gives any other doc.
+
+``add()`` keeps all of this up to date: docs are added to the bitmaps
+``FOLD`` at a time, the dense postings of the docs after them are scored in
+full. ``search()`` only reads, so it may run in another thread while the
+event loop adds items, and it only sees the docs indexed in full when it
+starts.
+"""
+
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from heapq import heapify, heappop, heappush, heappushpop, heapreplace, nlargest
+
+from content import Content
+
+TOKEN = re.compile(r"\w+")
+MAX_TOKEN = 64
+# Occurrences a word counts for, per field.
+FIELD_WEIGHTS = {"title": 2, "content": 1, "author": 1}
+K1 = 1.2
+B = 0.75
+# Terms with more postings than this are kept in buckets too.
+LONG_POSTINGS = 1024
+# Terms found in more than one doc in this many are kept as bitmaps instead.
+DENSE = 16
+# Docs added to the bitmaps at a time.
+FOLD = 1024
+# Shortest docs kept per dense term and frequency.
+CHAMPIONS = 128
+# A query with dense terms first looks for docs this share of the best
+# bound below it, and further each time too few are found there.
+FIRST_GAP = 1 / 32
+# Words of a query that are searched.
+MAX_QUERY_WORDS = 8
+# Query words shorter than this only match exactly.
+MIN_PREFIX = 3
+MAX_EXPANSIONS = 8
+# Words looked at per prefix when picking the expansions.
+MAX_PREFIX_SCAN = 1024
+# Frequency and length classes: from each bound up to the next one.
+CLASS_BOUNDS = [1, 2, 3, 4]
+while CLASS_BOUNDS[-1] < 1 << 32:
+    CLASS_BOUNDS.append(CLASS_BOUNDS[-1] * 3 // 2)
+# byte -> 1 if any of its bits is set, for ``bytes.translate``
+NONZERO = bytes(min(byte, 1) for byte in range(256))
+# byte -> positions of its set bits
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN.findall(text.lower()) if len(token) <= MAX_TOKEN]
+
+
+def class_of(value: int) -> int:
+    return max(bisect_right(CLASS_BOUNDS, value) - 1, 0)
+
+
+def highest(frequency_class: int) -> int:
+    return CLASS_BOUNDS[frequency_class + 1] - 1
+
+
+def term_tf(postings: array, freqs: array, doc: int) -> int:
+    """Frequency of ``doc`` in a term's postings, 0 when it is not there."""
+    position = bisect_left(postings, doc)
+    if position < len(postings) and postings[position] == doc:
+        return freqs[position]
+    return 0
+
+
+def with_reach(lookups: list) -> tuple[list, float]:
+    """Terms to look up, the one that may give the most first, and what
+    they may give in all.
+    """
+    lookups = sorted(lookups, key=lambda lookup: lookup[3], reverse=True)
+    return lookups, sum(bound for _, _, _, bound in lookups)
+
+
+def set_bits(value: int):
+    """Positions of the bits set in ``value``, lowest first."""
+    data = value.to_bytes((value.bit_length() + 7) // 8, "little")
+    # ``find`` skips the zero bytes far faster than a loop would.
+    flags = data.translate(NONZERO)
+    offset = flags.find(1)
+    while offset != -1:
+        for bit in BYTE_BITS[data[offset]]:
+            yield offset * 8 + bit
+        offset = flags.find(1, offset + 1)
+
+
+def keep_champion(
+    champions: dict[int, list[tuple[int, int]]], tf: int, length: int, doc: int
+) -> None:
+    """Add a doc with a dense term ``tf`` times to the term's champions, if
+    it is among the ``CHAMPIONS`` shortest with that frequency.
+    """
+    shortest = champions.get(tf)
+    if shortest is None:
+        champions[tf] = [(length, doc)]
+    elif len(shortest) < CHAMPIONS:
+        insort(shortest, (length, doc))
+    elif length < shortest[-1][0]:
+        # Inserted before the longest is dropped, a search copying the list
+        # in between sees one more, never a doc that is not kept.
+        insort(shortest, (length, doc))
+        shortest.pop()
+
+
+class Bitmaps:
+    """The dense terms as bitmaps, over the first ``covered`` docs.
+
+    ``sizes`` has how many of them each length class has, ``terms`` maps a
+    dense term to the number of its postings covered, its highest frequency
+    in them and, per length class, the bitmaps of the docs with the term in
+    frequency class 0, 1, ... or higher. Never changed once made.
+    """
+
+    __slots__ = ("covered", "sizes", "terms")
+
+    def __init__(
+        self,
+        covered: int = 0,
+        sizes: dict[int, int] | None = None,
+        terms: dict[int, tuple[int, int, dict[int, list[int]]]] | None = None,
+    ) -> None:
+        self.covered = covered
+        self.sizes = sizes or {}
+        self.terms = terms or {}
+
+
+class Hits(list):
+    """``(content id, score)`` pairs, best first.
+
+    ``truncated`` is set when words of the query, or words they are a
+    prefix of, were left out of the search.
+    """
+
+    truncated = False
+
+
+class SearchIndex:
+    def __init__(self) -> None:
+        self.term_ids: dict[str, int] = {}
+        # term id -> docs in doc order, and the term's frequency in each
+        self.postings: list[array] = []
+        self.freqs: list[array] = []
+        # Sorted terms for prefix lookups, the ones added since the last
+        # merge in ``new_terms``.
+        self.vocabulary: list[str] = []
+        self.new_terms: list[str] = []
+        # doc number -> content id, length and whether it is still live
+        self.doc_ids = array("q")
+        self.doc_lens = array("I")
+        self.alive = bytearray()
+        # doc number -> its length class and its number in the class
+        self.doc_classes = bytearray()
+        self.class_numbers = array("I")
+        # length class -> its docs in doc order
+        self.members: dict[int, array] = {}
+        # content id -> its live doc number
+        self.docs: dict[int, int] = {}
+        self.total_len = 0
+        # Docs before this one are in all their postings, searches only see
+        # those.
+        self.indexed = 0
+        # term id -> (frequency class, length class) -> docs in doc order and
+        # the term's frequency in each, for the long terms that are not dense
+        self.buckets: dict[int, dict[tuple[int, int], tuple[array, array]]] = {}
+        self.bitmaps = Bitmaps()
+        # dense term -> frequency -> ``(length, doc)`` of the shortest docs
+        # with the term that often, shortest first
+        self.champions: dict[int, dict[int, list[tuple[int, int]]]] = {}
+        # Terms found dense since the bitmaps were last made.
+        self.new_dense: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def add(self, item: Content) -> None:
+        """Index ``item``, replacing what was indexed under its id before."""
+        if item.id is None:
+            raise ValueError("only stored items, with an id, can be indexed")
+        self.remove(item.id)
+        counts: Counter[str] = Counter()
+        for name, weight in FIELD_WEIGHTS.items():
+            if name in item.fields:
+                for token in tokenize(str(getattr(item, name))):
+                    counts[token] += weight
+        doc = len(self.doc_ids)
+        length = sum(counts.values())
+        length_class = class_of(length)
+        members = self.members.setdefault(length_class, array("I"))
+        # Everything about the doc first, so a search in another thread
+        # never finds it in postings without it.
+        self.doc_ids.append(item.id)
+        self.doc_lens.append(length)
+        self.alive.append(1)
+        self.doc_classes.append(length_class)
+        self.class_numbers.append(len(members))
+        members.append(doc)
+        self.docs[item.id] = doc
+        self.total_len += length
+        for term, tf in counts.items():
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                term_id = len(self.postings)
+                self.freqs.append(array("I"))
+                self.postings.append(array("I"))
+                self.term_ids[term] = term_id
+                self.add_term(term)
+            postings = self.postings[term_id]
+            # Frequency first, so a search in another thread never sees a
+            # doc without it.
+            self.freqs[term_id].append(tf)
+            postings.append(doc)
+            champions = self.champions.get(term_id)
+            if champions is not None:
+                keep_champion(champions, tf, length, doc)
+                continue
+            buckets = self.buckets.get(term_id)
+            if buckets is not None:
+                key = (class_of(tf), length_class)
+                if key in buckets:
+                    docs, tfs = buckets[key]
+                    tfs.append(tf)
+                    docs.append(doc)
+                else:
+                    buckets[key] = (array("I", (doc,)), array("I", (tf,)))
+                if len(postings) * DENSE > len(self.docs):
+                    self.new_dense.add(term_id)
+            elif len(postings) > LONG_POSTINGS:
+                self.buckets[term_id] = self.fill_buckets(term_id)
+        self.indexed = doc + 1
+        if len(self.doc_ids) - self.bitmaps.covered >= FOLD:
+            self.fold()
+
+    def remove(self, content_id: int) -> None:
+        doc = self.docs.pop(content_id, None)
+        if doc is not None:
+            self.alive[doc] = 0
+            self.total_len -= self.doc_lens[doc]
+
+    def add_term(self, term: str) -> None:
+        insort(self.new_terms, term)
+        if len(self.new_terms) > len(self.vocabulary) // 8:
+            # Both are sorted runs, which ``sorted()`` merges in one pass.
+            self.vocabulary = sorted(self.vocabulary + self.new_terms)
+            self.new_terms = []
+
+    def fill_buckets(self, term_id: int) -> dict[tuple[int, int], tuple[array, array]]:
+        buckets: dict[tuple[int, int], tuple[array, array]] = {}
+        classes = self.doc_classes
+        for doc, tf in zip(self.postings[term_id], self.freqs[term_id]):
+            key = (class_of(tf), classes[doc])
+            if key not in buckets:
+                buckets[key] = (array("I"), array("I"))
+            docs, tfs = buckets[key]
+            docs.append(doc)
+            tfs.append(tf)
+        return buckets
+
+    def fold(self) -> None:
+        """Add the docs since the last call to the bitmaps, and make the
+        bitmaps of the terms found dense since.
+        """
+        terms = dict(self.bitmaps.terms)
+        lens = self.doc_lens
+        for term_id in self.new_dense:
+            terms[term_id] = (0, 0, {})
+            champions: dict[int, list[tuple[int, int]]] = {}
+            for doc, tf in zip(self.postings[term_id], self.freqs[term_id]):
+                keep_champion(champions, tf, lens[doc], doc)
+            self.champions[term_id] = champions
+        classes = self.doc_classes
+        numbers = self.class_numbers
+        for term_id, (position, most, tiers) in terms.items():
+            postings = self.postings[term_id]
+            freqs = self.freqs[term_id]
+            end = len(postings)
+            if position == end:
+                continue
+            # length class -> (number in the class, frequency) of new docs
+            found: dict[int, list[tuple[int, int]]] = {}
+            for doc, tf in zip(postings[position:end], freqs[position:end]):
+                found.setdefault(classes[doc], []).append((numbers[doc], tf))
+            tiers = dict(tiers)
+            for length_class, entries in found.items():
+                # Docs are numbered in order, the new ones only set higher
+                # bits.
+                first = entries[0][0] >> 3
+                size = (entries[-1][0] >> 3) - first + 1
+                levels = max(class_of(tf) for _, tf in entries) + 1
+                rows = [bytearray(size) for _ in range(levels)]
+                for number, tf in entries:
+                    byte = (number >> 3) - first
+                    bit = 1 << (number & 7)
+                    for row in rows[: class_of(tf) + 1]:
+                        row[byte] |= bit
+                bits = list(tiers.get(length_class, ()))
+                bits.extend([0] * (len(rows) - len(bits)))
+                for frequency_class, row in enumerate(rows):
+                    bits[frequency_class] |= int.from_bytes(row, "little") << first * 8
+                tiers[length_class] = bits
+            terms[term_id] = (end, max(most, max(freqs[position:end])), tiers)
+        sizes = {length_class: len(docs) for length_class, docs in self.members.items()}
+        self.bitmaps = Bitmaps(len(self.doc_ids), sizes, terms)
+        # Only now, a search that started before still reads the buckets.
+        for term_id in self.new_dense:
+            self.buckets.pop(term_id, None)
+        self.new_dense.clear()
+
+    def search(self, query: str, limit: int = 20) -> Hits:
+        """Best ``limit`` ``(content id, score)`` pairs for ``query``."""
+        term_ids, truncated = self.query_terms(query)
+        hits = Hits()
+        hits.truncated = truncated
+        if term_ids and self.docs:
+            ranking = Ranking(self, term_ids, limit)
+            ranking.run()
+            ranked = nlargest(limit, ranking.top)
+            hits.extend((self.doc_ids[doc], score) for score, doc in ranked)
+        return hits
+
+    def query_terms(self, query: str) -> tuple[list[int], bool]:
+        """Term ids of the query words and of the words they are prefixes of,
+        and whether any were left out.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        truncated = len(tokens) > MAX_QUERY_WORDS
+        del tokens[MAX_QUERY_WORDS:]
+        term_ids = dict.fromkeys(
+            self.term_ids[token] for token in tokens if token in self.term_ids
+        )
+        # ``add_term()`` moves the new terms to a new vocabulary first, read
+        # in this order a term may be met twice but is never missed.
+        new_terms = self.new_terms
+        vocabulary = self.vocabulary
+        for token in tokens:
+            if len(token) < MIN_PREFIX:
+                continue
+            matches: dict[int, None] = {}
+            for terms in (vocabulary, new_terms):
+                start = bisect_left(terms, token)
+                scanned = terms[start : start + MAX_PREFIX_SCAN]
+                for term in scanned:
+                    if term.startswith(token):
+                        matches[self.term_ids[term]] = None
+                    # ``add_term()`` may have inserted smaller terms before
+                    # ``start`` since.
+                    elif term > token:
+                        break
+                else:
+                    # Words past the scan may start with the token too.
+                    truncated |= len(scanned) == MAX_PREFIX_SCAN
+            truncated |= len(matches) > MAX_EXPANSIONS
+            for term_id in nlargest(
+                MAX_EXPANSIONS, matches, key=lambda term_id: len(self.postings[term_id])
+            ):
+                term_ids[term_id] = None
+        return list(term_ids), truncated
+
+    def idf(self, postings: array) -> float:
+        # Postings of dead docs are not tracked per term, assume they died
+        # as often as any others did.
+        df = len(postings) * len(self.docs) / len(self.doc_ids)
+        return math.log(1 + (len(self.docs) - df + 0.5) / (df + 0.5))
+
+
+class Ranking:
+    """The top ``limit`` docs of one query, as a heap ``top`` of ``(score,
+    doc)`` filled by ``run()``.
+    """
+
+    def __init__(self, index: SearchIndex, term_ids: list[int], limit: int) -> None:
+        self.index = index
+        self.limit = limit
+        self.top: list[tuple[float, int]] = []
+        # Docs scored, or found unable to beat the top.
+        self.seen: set[int] = set()
+        # One set of bitmaps for the whole query, ``add()`` may replace it,
+        # and the docs it sees, which the bitmaps never go past.
+        self.bitmaps = index.bitmaps
+        self.end = index.indexed
+        covered = self.bitmaps.covered
+        avg = index.total_len / len(index.docs) or 1.0
+        self.base = K1 * (1 - B)
+        self.scale = K1 * B / avg
+        # doc -> what the postings scored in full add up to for it
+        self.partial: dict[int, float] = {}
+        # Per term read by buckets, [bound of the next one, its position,
+        # (bound, docs, frequencies) best first, weight].
+        self.reads: list[list] = []
+        # (weight, highest frequency, bitmaps by length class) per dense term
+        self.dense: list[tuple[float, int, dict[int, list[int]]]] = []
+        # Per dense term, its champions not scored yet as a heap of (minus
+        # the bound of the next one, frequency, its position, champions).
+        streams: list[tuple[float, list]] = []
+        # (postings, freqs, weight, most it may give a doc not scored yet) of
+        # the terms to look up
+        dense_lookups: list[tuple[array, array, float, float]] = []
+        bucket_lookups: list[tuple[array, array, float, float]] = []
+        for term_id in term_ids:
+            postings = index.postings[term_id]
+            freqs = index.freqs[term_id]
+            weight = index.idf(postings) * (K1 + 1)
+            folded = self.bitmaps.terms.get(term_id)
+            if folded is not None:
+                position, most, tiers = folded
+                self.dense.append((weight, most, tiers))
+                bound = weight * most / (most + self.norm(0))
+                dense_lookups.append((postings, freqs, weight, bound))
+                # Copied before the postings are read, a champion added since
+                # is after them.
+                heap = []
+                for tf, shortest in list(index.champions[term_id].items()):
+                    shortest = list(shortest)
+                    bound = weight * tf / (tf + self.norm(shortest[0][0]))
+                    heap.append((-bound, tf, 0, shortest))
+                heapify(heap)
+                streams.append((weight, heap))
+                # The docs after the bitmaps.
+                self.score_postings(postings, freqs, weight, position)
+                continue
+            buckets = index.buckets.get(term_id)
+            if buckets is None:
+                self.score_postings(postings, freqs, weight, 0)
+                continue
+            order = []
+            for (frequency_class, length_class), (docs, tfs) in list(buckets.items()):
+                bound = self.impact(weight, highest(frequency_class), length_class)
+                order.append((bound, docs, tfs))
+            order.sort(key=lambda bucket: bucket[0], reverse=True)
+            self.reads.append([order[0][0], 0, order, weight])
+            bucket_lookups.append((postings, freqs, weight, order[0][0]))
+        # Terms looked up for the docs in the bitmaps, and for those after,
+        # with what they add up to at most.
+        self.dense_lookups = with_reach(dense_lookups)
+        self.lookups = with_reach(bucket_lookups + dense_lookups)
+        self.tail_lookups = with_reach(bucket_lookups)
+        # Docs with terms read by buckets, which are looked up only for them,
+        # None when every doc is looked up.
+        self.bucketed: set[int] | None = None
+        if len(self.reads) > 1:
+            self.separate()
+        # What each dense term may give the docs not scored here at most.
+        self.rests = [self.score_champions(weight, heap) for weight, heap in streams]
+        dense_lookups = [
+            (postings, freqs, weight, min(bound, rest))
+            for (postings, freqs, weight, bound), rest in zip(dense_lookups, self.rests)
+        ]
+        self.dense_lookups = with_reach(dense_lookups)
+        self.lookups = with_reach(bucket_lookups + dense_lookups)
+        # The most the dense terms add up to in any doc of the bitmaps, per
+        # length class and overall.
+        reaches = {
+            length_class: self.dense_bounds(length_class)[0]
+            for length_class in self.bitmaps.sizes
+        }
+        self.dense_reach = max(reaches.values(), default=0.0)
+        # Docs with a partial score, by what they may score in all.
+        bucket_reach = self.reach()
+        bucketed = self.bucketed
+        if bucketed is None:
+            bucketed = {
+                doc
+                for doc in self.partial
+                if any(
+                    term_tf(postings, freqs, doc)
+                    for postings, freqs, _, _ in bucket_lookups
+                )
+            }
+        classes = index.doc_classes
+        self.queue = sorted(
+            (
+                (
+                    score
+                    + (reaches[classes[doc]] if doc < covered else 0.0)
+                    + (bucket_reach if doc in bucketed else 0.0),
+                    doc,
+                )
+                for doc, score in self.partial.items()
+            ),
+            reverse=True,
+        )
+        self.queued = 0
+
+    def norm(self, length: int) -> float:
+        return self.base + self.scale * length
+
+    def impact(self, weight: float, tf: int, length: int) -> float:
+        """Impact of a term on docs of a length class with frequency ``tf``."""
+        return weight * tf / (tf + self.base + self.scale * CLASS_BOUNDS[length])
+
+    def score_postings(
+        self, postings: array, freqs: array, weight: float, start: int
+    ) -> None:
+        alive = self.index.alive
+        lens = self.index.doc_lens
+        partial = self.partial
+        base = self.base
+        scale = self.scale
+        stop = bisect_left(postings, self.end, start)
+        for doc, tf in zip(postings[start:stop], freqs[start:stop]):
+            if alive[doc]:
+                score = weight * tf / (tf + base + scale * lens[doc])
+                partial[doc] = partial.get(doc, 0.0) + score
+
+    def score_champions(self, weight: float, heap: list) -> float:
+        """Score the best ``limit`` live champions of a dense term, return what
+        the term may give any other doc at most.
+        """
+        alive = self.index.alive
+        scored = 0
+        while heap and scored < self.limit:
+            _, tf, position, shortest = heap[0]
+            if position == len(shortest):
+                # Only the bound of the docs not kept is left.
+                break
+            doc = shortest[position][1]
+            self.score(doc)
+            scored += alive[doc]
+            if position + 1 < len(shortest):
+                length = shortest[position + 1][0]
+            elif len(shortest) >= CHAMPIONS:
+                # The docs not kept are at least as long as the last one.
+                length = shortest[-1][0]
+            else:
+                heappop(heap)
+                continue
+            bound = weight * tf / (tf + self.norm(length))
+            heapreplace(heap, (-bound, tf, position + 1, shortest))
+        return -heap[0][0] if heap else 0.0
+
+    def dense_bounds(self, length_class: int) -> tuple[float, list]:
+        """What the dense terms add up to at most in docs of the length
+        class, and per term with docs there, the bound of each frequency
+        class and the bitmaps, highest bound first.
+        """
+        terms = []
+        for (weight, most, tiers), rest in zip(self.dense, self.rests):
+            bits = tiers.get(length_class)
+            if bits:
+                highs = [
+                    highest(frequency_class) for frequency_class in range(len(bits))
+                ]
+                highs[-1] = min(highs[-1], most)
+                bounds = [
+                    min(self.impact(weight, high, length_class), rest) for high in highs
+                ]
+                terms.append((bounds, bits))
+        terms.sort(key=lambda term: term[0][-1], reverse=True)
+        return sum(bounds[-1] for bounds, _ in terms), terms
+
+    def threshold(self) -> float:
+        return self.top[0][0] if len(self.top) == self.limit else -math.inf
+
+    def run(self) -> None:
+        if not self.dense:
+            self.read(-math.inf)
+            return
+        # Impacts flatten out as frequencies grow, the top results of common
+        # terms are often close to the best bound.
+        gap = FIRST_GAP
+        goal = self.upper() * (1 - gap)
+        while True:
+            # Every doc that may score above ``goal`` is scored after these.
+            self.read(goal)
+            while True:
+                found = self.split(max(goal, self.threshold()) - self.reach())
+                count = sum(bits.bit_count() for _, bits in found)
+                # Reading buckets lowers what their terms may add and so the
+                # docs found in the bitmaps, it is done while that is less
+                # work than scoring those docs.
+                read = 0
+                while (
+                    self.reads
+                    and read + len(self.next_bucket()) <= count
+                    and self.reach() + self.dense_reach > max(goal, self.threshold())
+                ):
+                    read += self.read_bucket()
+                if not read:
+                    break
+            for length_class, bits in found:
+                members = self.index.members[length_class]
+                for number in set_bits(bits):
+                    self.score(members[number])
+            if self.threshold() >= goal or goal <= 0.0:
+                return
+            gap = min(2 * gap, gap + 1 / 8)
+            goal = max(self.upper() * max(1 - gap, 0.0), self.threshold())
+
+    def upper(self) -> float:
+        """What a doc not scored yet may score at most."""
+        return max(self.pending(), self.reach() + self.dense_reach)
+
+    def pending(self) -> float:
+        """What the next doc in the queue may score."""
+        return self.queue[self.queued][0] if self.queued < len(self.queue) else 0.0
+
+    def reach(self) -> float:
+        """What a doc not met in the buckets read may get from their terms."""
+        return max((read[0] for read in self.reads), default=0.0)
+
+    def separate(self) -> None:
+        """Find the docs with terms read by buckets and score those with
+        more than one, so any other doc has one at most.
+        """
+        # Docs rarely have several of these terms, a few ``set`` operations
+        # find those that do for far less than it takes to read the buckets
+        # down to where the bounds of every term add up to the top results.
+        self.bucketed = set()
+        repeated: set[int] = set()
+        for _, _, order, _ in self.reads:
+            docs = set()
+            for _, bucket, _ in order:
+                docs.update(bucket)
+            repeated.update(self.bucketed.intersection(docs))
+            self.bucketed.update(docs)
+        for doc in repeated:
+            self.score(doc)
+
+    def next_bucket(self) -> array:
+        best = max(self.reads, key=lambda read: read[0])
+        return best[2][best[1]][1]
+
+    def read_bucket(self) -> int:
+        """Score the docs of the bucket with the best bound, return how many
+        it has.
+        """
+        best = max(self.reads, key=lambda read: read[0])
+        _, position, order, weight = best
+        _, docs, tfs = order[position]
+        # A doc met here has no other term read by buckets, but for the dense
+        # terms its frequency here is all its score lacks.
+        seen = self.seen
+        alive = self.index.alive
+        lens = self.index.doc_lens
+        covered = self.bitmaps.covered
+        top = self.top
+        _, dense_reach = self.dense_lookups
+        for doc, tf in zip(docs, tfs):
+            if doc >= self.end:
+                break
+            if doc in seen:
+                continue
+            seen.add(doc)
+            if alive[doc]:
+                norm = self.norm(lens[doc])
+                score = self.partial.get(doc, 0.0) + weight * tf / (tf + norm)
+                if doc >= covered:
+                    self.look_up(doc, norm, score, ([], 0.0))
+                elif len(top) < self.limit or score + dense_reach > top[0][0]:
+                    self.look_up(doc, norm, score, self.dense_lookups)
+        position += 1
+        if position < len(order):
+            best[0] = order[position][0]
+            best[1] = position
+        else:
+            self.reads.remove(best)
+        return len(docs)
+
+    def read(self, goal: float) -> None:
+        """Score docs best bound first until none left but those in the
+        bitmaps may score above ``goal`` or the top results.
+        """
+        queue = self.queue
+        reach = self.reach()
+        while max(self.pending(), reach) > max(goal, self.threshold()):
+            if self.queued < len(queue) and self.pending() >= reach:
+                self.score(queue[self.queued][1])
+                self.queued += 1
+            elif self.reads:
+                self.read_bucket()
+                reach = self.reach()
+            else:
+                return
+
+    def split(self, threshold: float) -> list[tuple[int, int]]:
+        """Bitmaps of the docs per length class the dense terms may give more
+        than ``threshold``.
+        """
+        threshold = max(threshold, 0.0)
+        groups = []
+        for length_class, size in self.bitmaps.sizes.items():
+            reach, terms = self.dense_bounds(length_class)
+            if reach <= threshold:
+                continue
+            # after[i]: what terms i and after add up to at most
+            after = [0.0] * (len(terms) + 1)
+            for term in range(len(terms) - 1, -1, -1):
+                after[term] = after[term + 1] + terms[term][0][-1]
+            last = len(terms) - 1
+            found = 0
+            # (docs, next term, what the terms before add up to at most)
+            stack = [((1 << size) - 1, 0, 0.0)]
+            while stack:
+                docs, term, total = stack.pop()
+                if total > threshold:
+                    found |= docs
+                    continue
+                bounds, bits = terms[term]
+                if term == last:
+                    # The lowest frequency class enough to go above.
+                    for frequency_class, bound in enumerate(bounds):
+                        if total + bound > threshold:
+                            found |= docs & bits[frequency_class]
+                            break
+                    continue
+                # ``^`` of a subset, as ``& ~`` makes a negative int and is
+                # far slower.
+                present = docs & bits[0]
+                if total + after[term + 1] > threshold:
+                    stack.append((docs ^ present, term + 1, total))
+                higher = 0
+                for frequency_class in range(len(bits) - 1, -1, -1):
+                    bound = total + bounds[frequency_class]
+                    if bound + after[term + 1] <= threshold:
+                        break
+                    if frequency_class:
+                        at_least = present & bits[frequency_class]
+                    else:
+                        at_least = present
+                    group = at_least ^ higher
+                    higher = at_least
+                    if group:
+                        stack.append((group, term + 1, bound))
+            if found:
+                groups.append((length_class, found))
+        return groups
+
+    def score(self, doc: int) -> None:
+        """Score ``doc`` over every query term into ``top``, unless it was
+        or cannot get in.
+        """
+        if doc in self.seen or doc >= self.end:
+            return
+        self.seen.add(doc)
+        if not self.index.alive[doc]:
+            return
+        bucketed = self.bucketed is None or doc in self.bucketed
+        if doc < self.bitmaps.covered:
+            lookups = self.lookups if bucketed else self.dense_lookups
+        else:
+            lookups = self.tail_lookups if bucketed else ([], 0.0)
+        norm = self.norm(self.index.doc_lens[doc])
+        self.look_up(doc, norm, self.partial.get(doc, 0.0), lookups)
+
+    def look_up(
+        self, doc: int, norm: float, score: float, lookups: tuple[list, float]
+    ) -> None:
+        """Add what the terms of ``lookups`` give ``doc`` to its ``score`` and
+        put it in ``top``, unless it cannot get in.
+        """
+        terms, rest = lookups
+        top = self.top
+        full = len(top) == self.limit
+        for postings, freqs, weight, bound in terms:
+            if full and score + rest <= top[0][0]:
+                return
+            rest -= bound
+            position = bisect_left(postings, doc)
+            if position < len(postings) and postings[position] == doc:
+                tf = freqs[position]
+                score += weight * tf / (tf + norm)
+        entry = (score, doc)
+        if not full:
+            heappush(top, entry)
+        elif entry > top[0]:
+            heappushpop(top, entry)
@@ -0,0 +1,297 @@
+"""Content-hashed, precompressed static files.
+
+``build()`` copies every file of ``static/`` to ``kitty.<hash>.jpg`` style
+names in the build directory and writes ``.gz`` (and ``.br`` when the
+``brotli`` package of the ``compression`` extra is installed) next to
+compressible ones. ``StaticAssets`` serves the result: hashed names as
+immutable, the original names with revalidation, each in the smallest
+encoding the client accepts.
+
+Run ``python static_assets.py`` at image build time to skip the work at
+startup; unchanged files are never rewritten either way.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass, field
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from page_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = "static"
+BUILD_DIR = os.environ.get("STATIC_BUILD_DIR", ".static-build")
+URL_PREFIX = "/static/"
+COMPRESSIBLE = {".css", ".js", ".json", ".svg", ".html", ".txt", ".xml", ".map"}
+# Encodings in order of preference, with the suffix of their variant files.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+
+@dataclass
+class Asset:
+    name: str
+    hashed_name: str
+    digest: str
+    media_type: str
+    # encoding ("identity", "gzip", "br") -> file in the build directory
+    files: dict[str, str] = field(default_factory=dict)
+
+
+def hashed(name: str, digest: str) -> str:
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def temp_path(path: str) -> str:
+    """New empty file next to ``path``, to write it and rename it into place.
+
+    The name is unique, so workers building the same directory at once
+    never write or rename each other's files.
+    """
+    fd, tmp = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".",
+        prefix=f"{os.path.basename(path)}.",
+        suffix=".tmp",
+    )
+    os.close(fd)
+    return tmp
+
+
+def write_once(path: str, data: bytes) -> None:
+    """Write ``path`` unless it exists; hashed names never change content.
+
+    When another process writes it at the same time, either copy wins.
+    """
+    if os.path.exists(path):
+        return
+    tmp = temp_path(path)
+    try:
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def build(
+    source_dir: str = SOURCE_DIR, build_dir: str = BUILD_DIR
+) -> dict[str, Asset]:
+    """Hash and precompress ``source_dir``, return assets by original name."""
+    assets = {}
+    for root, _, files in os.walk(source_dir):
+        for filename in sorted(files):
+            if filename.startswith("."):
+                continue
+            source = os.path.join(root, filename)
+            name = os.path.relpath(source, source_dir).replace(os.sep, "/")
+            with open(source, "rb") as file:
+                data = file.read()
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            asset = Asset(
+                name=name,
+                hashed_name=hashed(name, digest),
+                digest=digest,
+                media_type=guess_type(filename)[0] or "application/octet-stream",
+            )
+            target = os.path.join(build_dir, asset.hashed_name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            write_once(target, data)
+            asset.files["identity"] = target
+            if os.path.splitext(filename)[1].lower() in COMPRESSIBLE:
+                for encoding, suffix in ENCODINGS:
+                    if encoding == "br" and brotli is None:
+                        continue
+                    variant = target + suffix
+                    if not os.path.exists(variant):
+                        compressed = compress(data, encoding)
+                        if len(compressed) >= len(data):
+                            continue
+                        write_once(variant, compressed)
+                    asset.files[encoding] = variant
+            assets[name] = asset
+    return assets
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Codings with a non-zero q-value in an ``Accept-Encoding`` header."""
+    accepted = set()
+    listed = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        listed.add(coding)
+        if q > 0:
+            accepted.add(coding)
+    if "*" in accepted:
+        # ``*`` only stands for the codings the header does not name.
+        accepted |= {encoding for encoding, _ in ENCODINGS} - listed
+    return accepted
+
+
+class SendfileResponse(FileResponse):
+    """``FileResponse`` that hands the file to the server when it can.
+
+    Servers offering the ASGI ``http.response.zerocopysend`` extension get
+    the open file and send it with ``sendfile(2)``; the rest get the usual
+    chunked read.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            self.send_header_only
+            or self.stat_result is None
+            or "http.response.zerocopysend" not in scope.get("extensions", {})
+        ):
+            await super().__call__(scope, receive, send)
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        with open(self.path, "rb") as file:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": 0,
+                    "count": self.stat_result.st_size,
+                    "more_body": False,
+                }
+            )
+
+
+class StaticAssets:
+    """ASGI app for the assets of ``build()``, mounted where StaticFiles was.
+
+    It starts empty so it can be mounted at import time; ``load()`` the
+    build result during startup.
+    """
+
+    def __init__(self) -> None:
+        self.assets: dict[str, Asset] = {}
+        self.by_path: dict[str, tuple[Asset, bool]] = {}
+        self.stats: dict[str, os.stat_result] = {}
+        self.srcsets: dict[str, str] = {}
+
+    def load(
+        self,
+        assets: dict[str, Asset],
+        variants: dict[str, list[tuple[int, Asset]]] | None = None,
+    ) -> None:
+        """Serve ``assets`` and the resized ``variants`` of some of them."""
+        variants = variants or {}
+        self.assets = assets
+        self.by_path = {}
+        served = list(assets.values())
+        for asset_variants in variants.values():
+            served.extend(variant for _, variant in asset_variants)
+        for asset in served:
+            self.by_path[asset.name] = (asset, False)
+            self.by_path[asset.hashed_name] = (asset, True)
+        self.stats = {
+            path: os.stat(path) for asset in served for path in asset.files.values()
+        }
+        self.srcsets = {
+            name: ", ".join(
+                f"{URL_PREFIX}{variant.hashed_name} {width}w"
+                for width, variant in asset_variants
+            )
+            for name, asset_variants in variants.items()
+            if asset_variants
+        }
+
+    def url(self, name: str) -> str:
+        """Hashed URL of ``name``, or its plain URL when it is not an asset."""
+        asset = self.assets.get(name)
+        return URL_PREFIX + (asset.hashed_name if asset else name)
+
+    def rewrite(self, url: str) -> str:
+        """Hashed URL for a ``/static/...`` URL, other URLs unchanged."""
+        if not url.startswith(URL_PREFIX):
+            return url
+        return self.url(url[len(URL_PREFIX) :])
+
+    def srcset(self, url: str) -> str:
+        """``srcset`` value of the variants of a ``/static/...`` image, or ""."""
+        if not url.startswith(URL_PREFIX):
+            return ""
+        return self.srcsets.get(url[len(URL_PREFIX) :], "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        found = self.by_path.get(scope["path"].lstrip("/"))
+        if found is None or scope["method"] not in ("GET", "HEAD"):
+            status = 404 if found is None else 405
+            await Response(status_code=status)(scope, receive, send)
+            return
+        asset, immutable = found
+        headers = Headers(scope=scope)
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        encoding = next(
+            (
+                encoding
+                for encoding, _ in ENCODINGS
+                if encoding in accepted and encoding in asset.files
+            ),
+            "identity",
+        )
+        file = asset.files[encoding]
+        response_headers = {
+            "cache-control": IMMUTABLE if immutable else REVALIDATE,
+            "etag": f'"{asset.digest}-{encoding}"',
+        }
+        if len(asset.files) > 1:
+            response_headers["vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            response_headers["content-encoding"] = encoding
+        if etag_matches(headers.get("if-none-match"), response_headers["etag"]):
+            response = Response(status_code=304, headers=response_headers)
+            await response(scope, receive, send)
+            return
+        response = SendfileResponse(
+            file,
+            headers=response_headers,
+            media_type=asset.media_type,
+            stat_result=self.stats[file],
+            method=scope["method"],
+        )
+        await response(scope, receive, send)
+
+
+if __name__ == "__main__":
+    for asset in build().values():
+        variants = ", ".join(
+            f"{encoding} {os.path.getsize(path)}"
+            for encoding, path in asset.files.items()
+        )
+        print(f"{asset.name} -> {asset.hashed_name} ({variants})")
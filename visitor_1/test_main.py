@@ -0,0 +1,54 @@
+import asyncio
+
+from asgi_client import request
+from content import Article
+from page_cache import make_etag
+
+
+def test__update_content_reindexes_the_item(site):
+    async def run():
+        async with site.lifespan(site.app):
+            await site.search_ready.wait()
+            [content_id] = await site.add_content(
+                [Article("Sourdough basics", "Flour and water", "baker")]
+            )
+            item = await site.update_content(content_id, title="Rye basics")
+            assert (item.title, item.version) == ("Rye basics", 1)
+            assert (await site.store.get(content_id)).title == "Rye basics"
+            assert [hit for hit, _ in site.search_index.search("rye")] == [content_id]
+            assert site.search_index.search("sourdough") == []
+
+    asyncio.run(run())
+
+
+def test__update_content_of_a_missing_item(site):
+    async def run():
+        async with site.lifespan(site.app):
+            assert await site.update_content(10_000, title="Nothing") is None
+
+    asyncio.run(run())
+
+
+def test__update_content_refreshes_the_cached_page(site):
+    async def get(path, etag=""):
+        body = []
+        headers = [(b"if-none-match", etag.encode())]
+        status = await request(site.app, path, headers=headers, on_body=body.append)
+        return status, b"".join(body)
+
+    async def run():
+        async with site.lifespan(site.app):
+            [content_id] = await site.add_content(
+                [Article("Sourdough basics", "Flour and water", "baker")]
+            )
+            path = f"/content/{content_id}"
+            status, body = await get(path)
+            assert status == 200
+            assert await get(path, make_etag(body)) == (304, b"")
+            await site.update_content(content_id, title="Rye basics")
+            status, new_body = await get(path, make_etag(body))
+            assert status == 200
+            assert b"Rye basics" in new_body
+            assert await get(path, make_etag(new_body)) == (304, b"")
+
+    asyncio.run(run())
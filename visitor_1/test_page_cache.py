@@ -0,0 +1,26 @@
+from page_cache import PageCache
+
+
+def test__invalidate_drops_the_page():
+    cache = PageCache()
+    cache.put(1, 0, b"old")
+    cache.invalidate(1, 1)
+    assert cache.get(1) is None
+    assert cache.put(1, 1, b"new") is cache.get(1)
+
+
+def test__a_page_of_an_older_version_is_not_cached():
+    cache = PageCache()
+    cache.invalidate(1, 1)
+    cache.put(1, 0, b"old")
+    assert cache.get(1) is None
+
+
+def test__least_recently_used_pages_are_dropped():
+    cache = PageCache(maxsize=2)
+    cache.put(1, 0, b"one")
+    cache.put(2, 0, b"two")
+    cache.get(1)
+    cache.put(3, 0, b"three")
+    assert cache.get(2) is None
+    assert cache.get(1).body == b"one"
@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+import search_index
+from content import Article
+from search_index import B, K1, SearchIndex
+
+STEMS = [
+    first + vowel + last for first in "bcd" for vowel in "aeiou" for last in "klmnp"
+]
+# Most frequent first, stems with their endings all over the ranks.
+WORDS = [stem + ending for stem in STEMS for ending in ("", "a", "er", "ing", "s")]
+random.Random(0).shuffle(WORDS)
+
+
+@pytest.fixture(autouse=True)
+def small_sizes(monkeypatch):
+    """Limits low enough for a few hundred items to have terms of every
+    kind: short, in buckets and dense, with docs after the bitmaps.
+    """
+    monkeypatch.setattr(search_index, "LONG_POSTINGS", 16)
+    monkeypatch.setattr(search_index, "DENSE", 4)
+    monkeypatch.setattr(search_index, "FOLD", 32)
+    monkeypatch.setattr(search_index, "CHAMPIONS", 4)
+
+
+def make_items(ids, rng: random.Random) -> list[Article]:
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    items = []
+    for content_id in ids:
+        title = rng.choices(WORDS, weights, k=rng.randint(1, 4))
+        body = rng.choices(WORDS, weights, k=rng.randint(0, 40))
+        item = Article(" ".join(title), " ".join(body), rng.choice(WORDS))
+        item.id = content_id
+        items.append(item)
+    return items
+
+
+def brute_force(index: SearchIndex, query: str) -> dict[int, float]:
+    """BM25 of every live item over every posting of the query terms."""
+    avg = index.total_len / len(index.docs)
+    scores: dict[int, float] = {}
+    term_ids, _ = index.query_terms(query)
+    for term_id in term_ids:
+        postings = index.postings[term_id]
+        weight = index.idf(postings) * (K1 + 1)
+        for doc, tf in zip(postings, index.freqs[term_id]):
+            if index.alive[doc]:
+                norm = K1 * (1 - B + B * index.doc_lens[doc] / avg)
+                content_id = index.doc_ids[doc]
+                scores[content_id] = scores.get(content_id, 0.0) + (
+                    weight * tf / (tf + norm)
+                )
+    return scores
+
+
+def queries(rng: random.Random) -> list[str]:
+    common = WORDS[:8]
+    return [
+        *common,
+        *WORDS[-8:],
+        *(" ".join(rng.sample(common, 2)) for _ in range(8)),
+        *(" ".join(rng.sample(common, 3)) for _ in range(8)),
+        *(f"{rng.choice(common)} {rng.choice(WORDS[40:])}" for _ in range(8)),
+        *(stem for stem in STEMS[::8]),
+        *(f"{rng.choice(STEMS)} {rng.choice(WORDS)}" for _ in range(8)),
+        *(f"{rng.choice(STEMS)} {rng.choice(STEMS)}" for _ in range(8)),
+        "ba",
+        "nothing",
+    ]
+
+
+def assert_matches_brute_force(index: SearchIndex, rng: random.Random) -> None:
+    for query in queries(rng):
+        scores = brute_force(index, query)
+        for limit in (1, 5, 20):
+            hits = index.search(query, limit)
+            expected = sorted(scores.values(), reverse=True)[:limit]
+            assert [score for _, score in hits] == pytest.approx(expected), query
+            for content_id, score in hits:
+                assert scores[content_id] == pytest.approx(score), query
+
+
+def test__search_matches_brute_force_bm25():
+    rng = random.Random(0)
+    index = SearchIndex()
+    for item in make_items(range(400), rng):
+        index.add(item)
+    assert index.bitmaps.terms and index.buckets
+    assert index.bitmaps.covered < len(index.doc_ids)
+    assert_matches_brute_force(index, rng)
+
+
+def test__search_matches_brute_force_after_reindexing():
+    rng = random.Random(1)
+    index = SearchIndex()
+    for item in make_items(range(300), rng):
+        index.add(item)
+    # Some items several times over, with new text each time.
+    for item in make_items(rng.choices(range(300), k=300), rng):
+        index.add(item)
+    assert len(index) == 300
+    assert_matches_brute_force(index, rng)
+
+
+def test__search_skips_docs_being_indexed():
+    rng = random.Random(2)
+    index = SearchIndex()
+    for item in make_items(range(100), rng):
+        index.add(item)
+    # As a search in another thread may find them, halfway through add().
+    index.indexed -= 1
+    last = index.doc_ids[-1]
+    for word in WORDS[:8]:
+        assert last not in [content_id for content_id, _ in index.search(word, 100)]
+
+
+def test__prefixes_match_the_most_frequent_longer_words(monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_EXPANSIONS", 2)
+    index = SearchIndex()
+    items = [
+        Article("bread", "", "baker"),
+        Article("bread brew", "", "baker"),
+        Article("bread breakfast", "", "baker"),
+        Article("brew", "brewer", "baker"),
+        Article("br", "", "baker"),
+    ]
+    for content_id, item in enumerate(items):
+        item.id = content_id
+        index.add(item)
+    hits = index.search("bre")
+    assert sorted(content_id for content_id, _ in hits) == [0, 1, 2, 3]
+    assert hits.truncated
+    assert not index.search("brea").truncated
+    assert [content_id for content_id, _ in index.search("br")] == [4]